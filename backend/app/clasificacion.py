@@ -0,0 +1,49 @@
+CEREAL_PAN = 1
+LACTEO = 2
+FRUTA = 4
+HUEVO = 8
+EMBUTIDO = 16
+POSTRE = 32
+PROTEINA = 64
+
+DESAYUNO_SNACK = LACTEO | FRUTA | CEREAL_PAN | HUEVO | EMBUTIDO | PROTEINA
+
+POSTRE_VALIDO = {"lácteos", "fruta", "otros", "chocolate", "chocolate negro"}
+
+
+def texto_grupo(grupo_funcional: str | None, subgrupo_funcional: str | None) -> str:
+    return f"{str(grupo_funcional or '').lower()} {str(subgrupo_funcional or '').lower()}".strip()
+
+
+def clasificar_campos(
+    nombre: str | None,
+    rol_principal: str | None,
+    grupo_funcional: str | None,
+    subgrupo_funcional: str | None,
+) -> int:
+    texto = texto_grupo(grupo_funcional, subgrupo_funcional)
+    clasificacion = 0
+    if "cereal" in texto or "pan" in texto:
+        clasificacion |= CEREAL_PAN
+    if "lácte" in texto or "lacte" in texto:
+        clasificacion |= LACTEO
+    if "fruta" in texto:
+        clasificacion |= FRUTA
+    if "huevo" in texto or "huevo" in str(nombre or "").lower():
+        clasificacion |= HUEVO
+    if "embutido" in texto:
+        clasificacion |= EMBUTIDO
+    if any(valor in texto for valor in POSTRE_VALIDO):
+        clasificacion |= POSTRE
+    if "proteina" in str(rol_principal or "").lower():
+        clasificacion |= PROTEINA
+    return clasificacion
+
+
+def clasificar(alimento: dict) -> int:
+    return clasificar_campos(
+        alimento.get("nombre"),
+        alimento.get("rol_principal"),
+        alimento.get("grupo_funcional"),
+        alimento.get("subgrupo_funcional"),
+    )
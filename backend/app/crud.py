@@ -1,42 +1,162 @@
+import re
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime
 from typing import Iterable
 
-from .db import get_connection
+from .clasificacion import clasificar
+from .db import ALIMENTOS_COLUMNS, clave_lista_compra, get_connection, normalizar_fecha
+
+
+_INSERT_ALIMENTO = """
+    INSERT INTO alimentos
+    (ean, nombre, marca, kcal_100g, proteina_100g, hidratos_100g, grasas_100g,
+     rol_principal, grupo_funcional, subgrupo_funcional, clasificacion)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ean) DO UPDATE SET
+        nombre = excluded.nombre,
+        marca = excluded.marca,
+        kcal_100g = excluded.kcal_100g,
+        proteina_100g = excluded.proteina_100g,
+        hidratos_100g = excluded.hidratos_100g,
+        grasas_100g = excluded.grasas_100g,
+        rol_principal = excluded.rol_principal,
+        grupo_funcional = excluded.grupo_funcional,
+        subgrupo_funcional = excluded.subgrupo_funcional,
+        clasificacion = excluded.clasificacion
+"""
+
+_MISMO_ALIMENTO_SIN_EAN = """
+    COALESCE(ean, '') = '' AND normalizar(nombre) = normalizar(?) AND normalizar(marca) = normalizar(?)
+"""
+
+_ACTUALIZAR_ALIMENTO_SIN_EAN = f"""
+    UPDATE alimentos SET
+        nombre = ?, marca = ?, kcal_100g = ?, proteina_100g = ?, hidratos_100g = ?, grasas_100g = ?,
+        rol_principal = ?, grupo_funcional = ?, subgrupo_funcional = ?, clasificacion = ?
+    WHERE {_MISMO_ALIMENTO_SIN_EAN}
+"""
+
+_INSERTAR_ALIMENTO_SIN_EAN = f"""
+    INSERT INTO alimentos
+    (ean, nombre, marca, kcal_100g, proteina_100g, hidratos_100g, grasas_100g,
+     rol_principal, grupo_funcional, subgrupo_funcional, clasificacion)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM alimentos WHERE {_MISMO_ALIMENTO_SIN_EAN})
+"""
+
+
+def _valores_alimento(alimento: dict) -> tuple:
+    return (
+        alimento.get("ean"),
+        alimento["nombre"],
+        alimento.get("marca"),
+        alimento["kcal_100g"],
+        alimento["proteina_100g"],
+        alimento["hidratos_100g"],
+        alimento["grasas_100g"],
+        alimento["rol_principal"],
+        alimento["grupo_funcional"],
+        alimento["subgrupo_funcional"],
+        clasificar(alimento),
+    )
 
 
 def add_alimento(alimento: dict) -> None:
+    add_alimentos([alimento])
+
+
+def add_alimentos(alimentos: Iterable[dict]) -> int:
+    valores = [_valores_alimento(alimento) for alimento in alimentos]
+    if not valores:
+        return 0
+    con_ean = [fila for fila in valores if fila[0]]
+    sin_ean = [fila for fila in valores if not fila[0]]
     with get_connection() as connection:
-        connection.execute(
-            """
-            INSERT OR REPLACE INTO alimentos
-            (ean, nombre, marca, kcal_100g, proteina_100g, hidratos_100g, grasas_100g,
-             rol_principal, grupo_funcional, subgrupo_funcional)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                alimento.get("ean"),
-                alimento["nombre"],
-                alimento.get("marca"),
-                alimento["kcal_100g"],
-                alimento["proteina_100g"],
-                alimento["hidratos_100g"],
-                alimento["grasas_100g"],
-                alimento["rol_principal"],
-                alimento["grupo_funcional"],
-                alimento["subgrupo_funcional"],
-            ),
-        )
+        if con_ean:
+            connection.executemany(_INSERT_ALIMENTO, con_ean)
+        if sin_ean:
+            connection.executemany(_ACTUALIZAR_ALIMENTO_SIN_EAN, [(*fila[1:], fila[1], fila[2]) for fila in sin_ean])
+            connection.executemany(_INSERTAR_ALIMENTO_SIN_EAN, [(*fila, fila[1], fila[2]) for fila in sin_ean])
+    return len(valores)
+
+_COLUMNAS_ALIMENTOS = ", ".join(f"alimentos.{columna}" for columna in ALIMENTOS_COLUMNS)
 
 
 def list_alimentos() -> list[dict]:
     with get_connection() as connection:
-        rows = connection.execute("SELECT * FROM alimentos").fetchall()
+        rows = connection.execute(f"SELECT {_COLUMNAS_ALIMENTOS} FROM alimentos").fetchall()
+    return [dict(row) for row in rows]
+
+
+def list_alimentos_catalogo() -> list[dict]:
+    with get_connection() as connection:
+        rows = connection.execute(f"SELECT {_COLUMNAS_ALIMENTOS}, alimentos.clasificacion FROM alimentos").fetchall()
+    return [dict(row) for row in rows]
+
+
+def list_alimentos_pagina(
+    limite: int,
+    despues_de: int | None = None,
+    campos: list[str] | None = None,
+    rol_principal: str | None = None,
+    grupo_funcional: str | None = None,
+) -> tuple[list[dict], int | None]:
+    columnas = ", ".join(campo for campo in campos if campo in ALIMENTOS_COLUMNS) if campos else _COLUMNAS_ALIMENTOS
+    condiciones = ["rowid > ?"]
+    parametros: list = [despues_de or 0]
+    if rol_principal:
+        condiciones.append("rol_principal = ?")
+        parametros.append(rol_principal)
+    if grupo_funcional:
+        condiciones.append("grupo_funcional = ?")
+        parametros.append(grupo_funcional)
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT rowid AS _cursor, {columnas}
+            FROM alimentos
+            WHERE {" AND ".join(condiciones)}
+            ORDER BY rowid
+            LIMIT ?
+            """,
+            (*parametros, limite + 1),
+        ).fetchall()
+    alimentos = [dict(row) for row in rows[:limite]]
+    siguiente = alimentos[-1]["_cursor"] if len(rows) > limite else None
+    for alimento in alimentos:
+        del alimento["_cursor"]
+    return alimentos, siguiente
+
+
+def buscar_alimentos(consulta: str, limite: int = 20) -> list[dict]:
+    terminos = re.findall(r"\w+", consulta)
+    if not terminos:
+        return []
+    expresion = " ".join(f'"{termino}"*' for termino in terminos)
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT {_COLUMNAS_ALIMENTOS}
+            FROM alimentos_fts
+            JOIN alimentos ON alimentos.rowid = alimentos_fts.rowid
+            WHERE alimentos_fts MATCH ?
+            ORDER BY bm25(alimentos_fts, 10.0, 2.0, 1.0, 1.0)
+            LIMIT ?
+            """,
+            (expresion, limite),
+        ).fetchall()
     return [dict(row) for row in rows]
 
 
 def add_dia(fecha: str, tipo: str) -> str:
+    fecha = normalizar_fecha(fecha)
     with get_connection() as connection:
+        existente = connection.execute(
+            "SELECT id FROM dias WHERE fecha = ? ORDER BY rowid LIMIT 1", (fecha,)
+        ).fetchone()
+        if existente:
+            connection.execute("UPDATE dias SET tipo = ? WHERE id = ? AND tipo <> ?", (tipo, existente["id"], tipo))
+            return str(existente["id"])
         try:
             connection.execute(
                 "INSERT OR REPLACE INTO dias (id, fecha, tipo) VALUES (?, ?, ?)",
@@ -56,7 +176,7 @@ def list_dias() -> list[dict]:
         rows = connection.execute(
             """
             SELECT * FROM dias
-            ORDER BY substr(fecha, 7, 4), substr(fecha, 4, 2), substr(fecha, 1, 2)
+            ORDER BY fecha
             """
         ).fetchall()
     return [dict(row) for row in rows]
@@ -143,6 +263,32 @@ def list_comida_items(comida_id: int) -> list[dict]:
     return [dict(row) for row in rows]
 
 
+def list_items_por_dias(dia_ids: Iterable[str]) -> list[dict]:
+    dia_ids = list(dia_ids)
+    if not dia_ids:
+        return []
+    marcadores = ", ".join("?" for _ in dia_ids)
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT
+                comida_items.*,
+                comidas.dia_id,
+                consumo.estado AS consumo_estado,
+                consumo.gramos AS consumo_gramos
+            FROM comidas
+            JOIN comida_items ON comida_items.comida_id = comidas.id
+            LEFT JOIN consumo ON consumo.id = (
+                SELECT MAX(ultimo.id) FROM consumo AS ultimo WHERE ultimo.comida_item_id = comida_items.id
+            )
+            WHERE comidas.dia_id IN ({marcadores})
+            ORDER BY comida_items.id
+            """,
+            dia_ids,
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
 def get_comida_item(item_id: int) -> dict | None:
     with get_connection() as connection:
         row = connection.execute(
@@ -241,12 +387,64 @@ def upsert_despensa(ean: str, nombre: str, estado: str) -> None:
         )
 
 
-def add_lista_compra(ean: str | None, nombre: str) -> None:
+def add_lista_compra(ean: str | None, nombre: str, gramos: float = 0) -> None:
+    upsert_lista_compra([{"ean": ean, "nombre": nombre, "gramos": gramos}])
+
+
+def upsert_lista_compra(faltantes: Iterable[dict]) -> int:
+    filas = [
+        (clave_lista_compra(item.get("ean"), item["nombre"]), item.get("ean") or None, item["nombre"], item.get("gramos") or 0)
+        for item in faltantes
+    ]
+    if not filas:
+        return 0
     with get_connection() as connection:
-        connection.execute(
-            "INSERT INTO lista_compra (ean, nombre, comprado) VALUES (?, ?, 0)",
-            (ean, nombre),
+        connection.executemany(
+            """
+            INSERT INTO lista_compra (clave, ean, nombre, gramos, comprado)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(clave) DO UPDATE SET
+                gramos = CASE WHEN lista_compra.comprado THEN 0 ELSE lista_compra.gramos END + excluded.gramos,
+                comprado = 0
+            """,
+            filas,
         )
+    return len(filas)
+
+
+def list_faltantes_compra(desde: date, hasta: date) -> list[dict]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT faltantes.ean, faltantes.nombre, faltantes.gramos
+            FROM (
+                SELECT
+                    COALESCE(comida_items.ean, '') AS ean,
+                    COALESCE(comida_items.nombre, '') AS nombre,
+                    SUM(comida_items.gramos) AS gramos
+                FROM dias
+                JOIN comidas ON comidas.dia_id = dias.id
+                JOIN comida_items ON comida_items.comida_id = comidas.id
+                WHERE dias.fecha BETWEEN ? AND ?
+                GROUP BY COALESCE(comida_items.ean, ''), COALESCE(comida_items.nombre, '')
+            ) AS faltantes
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM despensa
+                WHERE despensa.estado = 'disponible'
+                  AND (
+                    (faltantes.ean <> '' AND despensa.ean = faltantes.ean)
+                    OR (
+                        faltantes.ean = ''
+                        AND despensa.nombre <> ''
+                        AND normalizar(despensa.nombre) = normalizar(faltantes.nombre)
+                    )
+                  )
+            )
+            """,
+            (desde.isoformat(), hasta.isoformat()),
+        ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def list_lista_compra() -> list[dict]:
@@ -305,6 +503,82 @@ def list_consumo_por_dia(dia_id: str) -> list[dict]:
     return [dict(row) for row in rows]
 
 
+def resumen_macros_dias(dia_ids: Iterable[str]) -> list[dict]:
+    dia_ids = list(dia_ids)
+    if not dia_ids:
+        return []
+    marcadores = ", ".join("?" for _ in dia_ids)
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT
+                dias.id AS dia_id,
+                dias.fecha,
+                dias.tipo,
+                objetivos_dia.kcal AS objetivo_kcal,
+                objetivos_dia.proteina AS objetivo_proteina,
+                objetivos_dia.hidratos AS objetivo_hidratos,
+                objetivos_dia.grasas AS objetivo_grasas,
+                COALESCE(SUM(comida_items.kcal), 0) AS kcal,
+                COALESCE(SUM(comida_items.proteina), 0) AS proteina,
+                COALESCE(SUM(comida_items.hidratos), 0) AS hidratos,
+                COALESCE(SUM(comida_items.grasas), 0) AS grasas
+            FROM dias
+            LEFT JOIN objetivos_dia ON objetivos_dia.tipo = dias.tipo
+            LEFT JOIN comidas ON comidas.dia_id = dias.id
+            LEFT JOIN comida_items ON comida_items.comida_id = comidas.id
+            WHERE dias.id IN ({marcadores})
+            GROUP BY dias.id
+            """,
+            dia_ids,
+        ).fetchall()
+    return [_completar_objetivo(dict(row)) for row in rows]
+
+
+def resumen_macros_comidas(desde: date, hasta: date) -> list[dict]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            WITH rango AS MATERIALIZED (
+                SELECT id, fecha, tipo
+                FROM dias
+                WHERE fecha BETWEEN ? AND ?
+            )
+            SELECT
+                rango.id AS dia_id,
+                rango.fecha,
+                rango.fecha AS fecha_iso,
+                rango.tipo,
+                objetivos_dia.kcal AS objetivo_kcal,
+                objetivos_dia.proteina AS objetivo_proteina,
+                objetivos_dia.hidratos AS objetivo_hidratos,
+                objetivos_dia.grasas AS objetivo_grasas,
+                comidas.id AS comida_id,
+                comidas.nombre AS comida_nombre,
+                COALESCE(SUM(comida_items.kcal), 0) AS kcal,
+                COALESCE(SUM(comida_items.proteina), 0) AS proteina,
+                COALESCE(SUM(comida_items.hidratos), 0) AS hidratos,
+                COALESCE(SUM(comida_items.grasas), 0) AS grasas
+            FROM rango
+            LEFT JOIN objetivos_dia ON objetivos_dia.tipo = rango.tipo
+            LEFT JOIN comidas ON comidas.dia_id = rango.id
+            LEFT JOIN comida_items ON comida_items.comida_id = comidas.id
+            GROUP BY rango.id, comidas.id
+            ORDER BY rango.fecha, rango.id, comidas.id
+            """,
+            (desde.isoformat(), hasta.isoformat()),
+        ).fetchall()
+    return [_completar_objetivo(dict(row)) for row in rows]
+
+
+def _completar_objetivo(resumen: dict) -> dict:
+    if resumen["objetivo_kcal"] is None:
+        defaults = _objetivos_por_defecto().get(resumen["tipo"], {})
+        for macro in ("kcal", "proteina", "hidratos", "grasas"):
+            resumen[f"objetivo_{macro}"] = defaults.get(macro, 0)
+    return resumen
+
+
 def record_aprendizaje(evento: str, detalle: str) -> None:
     with get_connection() as connection:
         connection.execute(
@@ -316,6 +590,21 @@ def record_aprendizaje(evento: str, detalle: str) -> None:
         )
 
 
+def record_aprendizajes(eventos: Iterable[tuple[str, str, str]]) -> int:
+    eventos = list(eventos)
+    if not eventos:
+        return 0
+    with get_connection() as connection:
+        connection.executemany(
+            """
+            INSERT INTO aprendizaje (evento, detalle, creado_en)
+            VALUES (?, ?, ?)
+            """,
+            eventos,
+        )
+    return len(eventos)
+
+
 def _objetivos_por_defecto() -> dict:
     return {
         "Entreno": {"kcal": 2400, "proteina": 150, "hidratos": 260, "grasas": 70},
@@ -354,9 +643,10 @@ def ensure_objetivos() -> None:
 
 
 def list_objetivos() -> list[dict]:
-    ensure_objetivos()
     with get_connection() as connection:
         rows = connection.execute("SELECT * FROM objetivos_dia").fetchall()
+    if not rows:
+        return [{"tipo": tipo, **valores} for tipo, valores in _objetivos_por_defecto().items()]
     return [dict(row) for row in rows]
 
 
@@ -382,7 +672,6 @@ def delete_objetivo(tipo: str) -> None:
 
 
 def get_objetivo(tipo: str) -> dict:
-    ensure_objetivos()
     with get_connection() as connection:
         row = connection.execute(
             "SELECT * FROM objetivos_dia WHERE tipo = ?",
@@ -395,7 +684,6 @@ def get_objetivo(tipo: str) -> dict:
 
 
 def get_default_tipo() -> str:
-    ensure_objetivos()
     with get_connection() as connection:
         row = connection.execute(
             "SELECT valor FROM ajustes_app WHERE clave = 'default_tipo'"
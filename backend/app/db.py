@@ -1,11 +1,61 @@
+import asyncio
+import contextvars
+import functools
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable
 
+from .clasificacion import clasificar_campos
 
-DB_PATH = Path(__file__).resolve().parent.parent / "befitlab.db"
 
-ALIMENTOS_COLUMNS = {
+DB_PATH = Path(os.environ.get("BEFITLAB_DB_PATH", Path(__file__).resolve().parent.parent / "befitlab.db"))
+POOL_SIZE = int(os.environ.get("BEFITLAB_DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.environ.get("BEFITLAB_DB_POOL_TIMEOUT", "30"))
+PERFIL = os.environ.get("BEFITLAB_DB_PERFIL", "durable")
+
+PERFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5_000,
+        "cache_size": -16_000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1_000,
+        "journal_size_limit": 64 * 1024 * 1024,
+    },
+    "rapido": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5_000,
+        "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1_000,
+        "journal_size_limit": 64 * 1024 * 1024,
+    },
+    "importacion": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "busy_timeout": 30_000,
+        "cache_size": -256_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 0,
+        "journal_size_limit": 64 * 1024 * 1024,
+    },
+}
+
+ALIMENTOS_COLUMNS = (
     "ean",
     "nombre",
     "marca",
@@ -16,8 +66,34 @@ ALIMENTOS_COLUMNS = {
     "rol_principal",
     "grupo_funcional",
     "subgrupo_funcional",
+)
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y")
+
+INDICES = {
+    "idx_dias_fecha": "dias(fecha)",
+    "idx_comidas_dia": "comidas(dia_id)",
+    "idx_comida_items_comida": "comida_items(comida_id)",
+    "idx_consumo_item": "consumo(comida_item_id)",
+    "idx_despensa_estado": "despensa(estado, ean)",
+    "idx_lista_compra_comprado": "lista_compra(comprado, nombre)",
+    "idx_alimentos_rol": "alimentos(rol_principal)",
+    "idx_alimentos_grupo": "alimentos(grupo_funcional)",
 }
 
+TABLAS_VERSIONADAS = (
+    "alimentos",
+    "dias",
+    "comidas",
+    "comida_items",
+    "consumo",
+    "despensa",
+    "lista_compra",
+    "objetivos_dia",
+    "ajustes_app",
+)
+AHORA_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
 LEGACY_ALIMENTOS_COLUMNS = {
     "grupo_mediterraneo",
     "frecuencia_mediterranea",
@@ -39,7 +115,8 @@ def _create_alimentos_table(cursor: sqlite3.Cursor) -> None:
             grasas_100g REAL NOT NULL,
             rol_principal TEXT NOT NULL,
             grupo_funcional TEXT NOT NULL,
-            subgrupo_funcional TEXT NOT NULL
+            subgrupo_funcional TEXT NOT NULL,
+            clasificacion INTEGER
         )
         """
     )
@@ -81,119 +158,620 @@ def _ensure_alimentos_schema(cursor: sqlite3.Cursor) -> None:
         cursor.execute(f"ALTER TABLE alimentos ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
 
 
+def _ensure_alimentos_clasificacion(cursor: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(alimentos)").fetchall()}
+    if "clasificacion" not in columns:
+        cursor.execute("ALTER TABLE alimentos ADD COLUMN clasificacion INTEGER")
+    cursor.execute(
+        """
+        UPDATE alimentos
+        SET clasificacion = clasificar(nombre, rol_principal, grupo_funcional, subgrupo_funcional)
+        WHERE clasificacion IS NULL
+        """
+    )
+
+
+class CursorMedido(sqlite3.Cursor):
+    def execute(self, *args):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            _acumular_tiempo_db(inicio)
+
+    def executemany(self, sql: str, parametros):
+        trazar = _consultas.get() is not None
+        if trazar:
+            self.connection.set_trace_callback(None)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            _acumular_tiempo_db(inicio)
+            if trazar:
+                self.connection.set_trace_callback(_trazar_consulta)
+                _trazar_consulta(sql)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _acumular_tiempo_db(inicio)
+
+    def fetchmany(self, *args):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            _acumular_tiempo_db(inicio)
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _acumular_tiempo_db(inicio)
+
+
+class ConexionMedida(sqlite3.Connection):
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql: str, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def commit(self) -> None:
+        inicio = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            _acumular_tiempo_db(inicio)
+
+
+class ConnectionPool:
+    def __init__(self, path: Path, size: int, timeout: float) -> None:
+        self.path = path
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self._libres: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+
+    def _abrir(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, factory=ConexionMedida)
+        connection.row_factory = sqlite3.Row
+        connection.create_function("normalizar", 1, normalizar_nombre, deterministic=True)
+        aplicar_perfil(connection)
+        return connection
+
+    def adquirir(self) -> sqlite3.Connection:
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            crear = self._creadas < self.size
+            if crear:
+                self._creadas += 1
+        if crear:
+            try:
+                return self._abrir()
+            except Exception:
+                with self._lock:
+                    self._creadas -= 1
+                raise
+        try:
+            return self._libres.get(timeout=self.timeout)
+        except queue.Empty as exc:
+            raise TimeoutError(f"Sin conexiones libres tras {self.timeout}s (pool de {self.size})") from exc
+
+    def liberar(self, connection: sqlite3.Connection) -> None:
+        self._libres.put(connection)
+
+    def cerrar(self) -> None:
+        while True:
+            try:
+                connection = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._creadas -= 1
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+_lectores: ThreadPoolExecutor | None = None
+_escritor: ThreadPoolExecutor | None = None
+_esquema_listo = False
+_esquema_lock = threading.Lock()
+_local = threading.local()
+_consultas: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar("befitlab_consultas", default=None)
+
+
+def _trazar_consulta(sentencia: str) -> None:
+    if sentencia.startswith("--"):
+        return
+    consultas = _consultas.get()
+    if consultas is not None:
+        consultas.append(sentencia)
+
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|[xX]'[0-9a-fA-F]*'|(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalizar_consulta(sentencia: str) -> str:
+    sentencia = _LITERALES.sub("?", " ".join(sentencia.split()))
+    return _LISTAS.sub("(?)", sentencia)
+
+
+def consultas_repetidas(consultas: list[str]) -> Counter:
+    return Counter(normalizar_consulta(sentencia) for sentencia in consultas)
+
+
+_tiempo_db: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar("befitlab_tiempo_db", default=None)
+
+
+def _acumular_tiempo_db(inicio: float) -> None:
+    acumulado = _tiempo_db.get()
+    if acumulado is not None:
+        acumulado[0] += time.perf_counter() - inicio
+
+
+@contextmanager
+def medir_tiempo_db():
+    acumulado = [0.0]
+    token = _tiempo_db.set(acumulado)
+    try:
+        yield acumulado
+    finally:
+        _tiempo_db.reset(token)
+
+
+@contextmanager
+def contar_consultas():
+    consultas: list[str] = []
+    token = _consultas.set(consultas)
+    try:
+        yield consultas
+    finally:
+        _consultas.reset(token)
+
+
+def versiones_datos(tablas: tuple[str, ...]) -> dict[str, int]:
+    marcadores = ", ".join("?" for _ in tablas)
+    with get_connection() as connection:
+        filas = connection.execute(
+            f"SELECT tabla, version FROM versiones WHERE tabla IN ({marcadores})",
+            tablas,
+        ).fetchall()
+    versiones = {fila["tabla"]: fila["version"] for fila in filas}
+    return {tabla: versiones.get(tabla, 0) for tabla in tablas}
+
+
+def estado_datos(tablas: tuple[str, ...], variante: str = "") -> tuple[str, float]:
+    marcadores = ", ".join("?" for _ in tablas)
+    with get_connection() as connection:
+        filas = {
+            fila["tabla"]: fila
+            for fila in connection.execute(
+                f"SELECT tabla, version, modificado FROM versiones WHERE tabla IN ({marcadores})",
+                tablas,
+            ).fetchall()
+        }
+    versiones = ".".join(str(filas[tabla]["version"]) if tabla in filas else "0" for tabla in tablas)
+    modificado = max((fila["modificado"] for fila in filas.values()), default=0.0)
+    sufijo = f"-{variante}" if variante else ""
+    return f'W/"{int(modificado * 1000):x}-{versiones}{sufijo}"', modificado
+
+
+def _ensure_alimentos_fts(cursor: sqlite3.Cursor) -> None:
+    existe = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alimentos_fts'"
+    ).fetchone()
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS alimentos_fts USING fts5(
+            nombre,
+            marca,
+            grupo_funcional,
+            subgrupo_funcional,
+            content='alimentos',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS alimentos_fts_ai AFTER INSERT ON alimentos BEGIN
+            INSERT INTO alimentos_fts (rowid, nombre, marca, grupo_funcional, subgrupo_funcional)
+            VALUES (new.rowid, new.nombre, new.marca, new.grupo_funcional, new.subgrupo_funcional);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS alimentos_fts_ad AFTER DELETE ON alimentos BEGIN
+            INSERT INTO alimentos_fts (alimentos_fts, rowid, nombre, marca, grupo_funcional, subgrupo_funcional)
+            VALUES ('delete', old.rowid, old.nombre, old.marca, old.grupo_funcional, old.subgrupo_funcional);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS alimentos_fts_au AFTER UPDATE ON alimentos BEGIN
+            INSERT INTO alimentos_fts (alimentos_fts, rowid, nombre, marca, grupo_funcional, subgrupo_funcional)
+            VALUES ('delete', old.rowid, old.nombre, old.marca, old.grupo_funcional, old.subgrupo_funcional);
+            INSERT INTO alimentos_fts (rowid, nombre, marca, grupo_funcional, subgrupo_funcional)
+            VALUES (new.rowid, new.nombre, new.marca, new.grupo_funcional, new.subgrupo_funcional);
+        END
+        """
+    )
+    if not existe:
+        cursor.execute("INSERT INTO alimentos_fts (alimentos_fts) VALUES ('rebuild')")
+
+
+def clave_lista_compra(ean: str | None, nombre: str | None) -> str:
+    return ean if ean else f"nombre:{normalizar_nombre(nombre)}"
+
+
+def _ensure_lista_compra_schema(cursor: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(lista_compra)").fetchall()}
+    if "clave" not in columns:
+        cursor.execute("ALTER TABLE lista_compra ADD COLUMN clave TEXT")
+    if "gramos" not in columns:
+        cursor.execute("ALTER TABLE lista_compra ADD COLUMN gramos REAL NOT NULL DEFAULT 0")
+    cursor.execute(
+        """
+        UPDATE lista_compra
+        SET clave = CASE WHEN ean IS NOT NULL AND ean != '' THEN ean ELSE 'nombre:' || normalizar(nombre) END
+        WHERE clave IS NULL
+        """
+    )
+    cursor.execute(
+        """
+        DELETE FROM lista_compra
+        WHERE id NOT IN (
+            SELECT COALESCE(MIN(CASE WHEN comprado = 0 THEN id END), MIN(id))
+            FROM lista_compra
+            GROUP BY clave
+        )
+        """
+    )
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_lista_compra_clave ON lista_compra(clave)")
+
+
 def init_db() -> None:
+    global _esquema_listo
+    with _esquema_lock:
+        if _esquema_listo:
+            return
+        _crear_esquema()
+        _esquema_listo = True
+
+
+def _crear_esquema() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(DB_PATH) as connection:
-        cursor = connection.cursor()
-        _ensure_alimentos_schema(cursor)
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS dias (
-                id TEXT PRIMARY KEY,
-                fecha TEXT NOT NULL,
-                tipo TEXT NOT NULL
+    connection = sqlite3.connect(DB_PATH)
+    try:
+        aplicar_perfil(connection)
+        connection.create_function("normalizar", 1, normalizar_nombre, deterministic=True)
+        connection.create_function("clasificar", 4, clasificar_campos, deterministic=True)
+        migrar(connection)
+    finally:
+        connection.close()
+
+
+def migrar(connection: sqlite3.Connection) -> int:
+    connection.isolation_level = None
+    cursor = connection.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version == VERSION_ESQUEMA:
+        return version
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version > VERSION_ESQUEMA:
+            raise RuntimeError(
+                f"La base de datos está en la versión de esquema {version} y esta aplicación solo conoce hasta la {VERSION_ESQUEMA}"
             )
-            """
+        for numero, migracion in enumerate(MIGRACIONES[version:], start=version + 1):
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+    return VERSION_ESQUEMA
+
+
+def _migracion_tablas(cursor: sqlite3.Cursor) -> None:
+    _ensure_alimentos_schema(cursor)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dias (
+            id TEXT PRIMARY KEY,
+            fecha TEXT NOT NULL,
+            tipo TEXT NOT NULL
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS comidas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dia_id TEXT NOT NULL,
-                nombre TEXT NOT NULL,
-                postre_obligatorio INTEGER NOT NULL DEFAULT 0,
-                FOREIGN KEY(dia_id) REFERENCES dias(id)
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS comidas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dia_id TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            postre_obligatorio INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(dia_id) REFERENCES dias(id)
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS comida_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                comida_id INTEGER NOT NULL,
-                ean TEXT,
-                nombre TEXT NOT NULL,
-                gramos REAL NOT NULL,
-                kcal REAL NOT NULL,
-                proteina REAL NOT NULL,
-                hidratos REAL NOT NULL,
-                grasas REAL NOT NULL,
-                rol_principal TEXT NOT NULL,
-                es_golosina INTEGER NOT NULL DEFAULT 0,
-                gramos_iniciales REAL NOT NULL,
-                FOREIGN KEY(comida_id) REFERENCES comidas(id)
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS comida_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            comida_id INTEGER NOT NULL,
+            ean TEXT,
+            nombre TEXT NOT NULL,
+            gramos REAL NOT NULL,
+            kcal REAL NOT NULL,
+            proteina REAL NOT NULL,
+            hidratos REAL NOT NULL,
+            grasas REAL NOT NULL,
+            rol_principal TEXT NOT NULL,
+            es_golosina INTEGER NOT NULL DEFAULT 0,
+            gramos_iniciales REAL NOT NULL,
+            FOREIGN KEY(comida_id) REFERENCES comidas(id)
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS despensa (
-                ean TEXT PRIMARY KEY,
-                nombre TEXT NOT NULL,
-                estado TEXT NOT NULL
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS despensa (
+            ean TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            estado TEXT NOT NULL
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS lista_compra (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ean TEXT,
-                nombre TEXT NOT NULL,
-                comprado INTEGER NOT NULL DEFAULT 0
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lista_compra (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ean TEXT,
+            nombre TEXT NOT NULL,
+            comprado INTEGER NOT NULL DEFAULT 0,
+            clave TEXT,
+            gramos REAL NOT NULL DEFAULT 0
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS consumo (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                comida_item_id INTEGER NOT NULL,
-                estado TEXT NOT NULL,
-                gramos REAL NOT NULL,
-                FOREIGN KEY(comida_item_id) REFERENCES comida_items(id)
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS consumo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            comida_item_id INTEGER NOT NULL,
+            estado TEXT NOT NULL,
+            gramos REAL NOT NULL,
+            FOREIGN KEY(comida_item_id) REFERENCES comida_items(id)
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS aprendizaje (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                evento TEXT NOT NULL,
-                detalle TEXT NOT NULL,
-                creado_en TEXT NOT NULL
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS aprendizaje (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            evento TEXT NOT NULL,
+            detalle TEXT NOT NULL,
+            creado_en TEXT NOT NULL
         )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS objetivos_dia (
-                tipo TEXT PRIMARY KEY,
-                kcal REAL NOT NULL,
-                proteina REAL NOT NULL,
-                hidratos REAL NOT NULL,
-                grasas REAL NOT NULL
-            )
-            """
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS objetivos_dia (
+            tipo TEXT PRIMARY KEY,
+            kcal REAL NOT NULL,
+            proteina REAL NOT NULL,
+            hidratos REAL NOT NULL,
+            grasas REAL NOT NULL
         )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ajustes_app (
+            clave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _migracion_indices(cursor: sqlite3.Cursor) -> None:
+    for nombre, definicion in INDICES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+
+
+def _migracion_versiones(cursor: sqlite3.Cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS versiones (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            modificado REAL NOT NULL
+        )
+        """
+    )
+    for tabla in TABLAS_VERSIONADAS:
         cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS ajustes_app (
-                clave TEXT PRIMARY KEY,
-                valor TEXT NOT NULL
+            f"INSERT OR IGNORE INTO versiones (tabla, version, modificado) VALUES (?, 0, {AHORA_SQL})",
+            (tabla,),
+        )
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_{evento.lower()} AFTER {evento} ON {tabla} BEGIN
+                    UPDATE versiones SET version = version + 1, modificado = {AHORA_SQL} WHERE tabla = '{tabla}';
+                END
+                """
             )
-            """
+
+
+def _migracion_fechas_iso(cursor: sqlite3.Cursor) -> None:
+    cambios = []
+    for dia_id, fecha in cursor.execute("SELECT id, fecha FROM dias").fetchall():
+        try:
+            normalizada = normalizar_fecha(fecha)
+        except ValueError:
+            continue
+        if normalizada != fecha:
+            cambios.append((normalizada, dia_id))
+    cursor.executemany("UPDATE dias SET fecha = ? WHERE id = ?", cambios)
+    cursor.execute("DROP INDEX IF EXISTS idx_dias_fecha_iso")
+    _migracion_indices(cursor)
+
+
+MIGRACIONES: tuple[Callable[[sqlite3.Cursor], None], ...] = (
+    _migracion_tablas,
+    _ensure_alimentos_clasificacion,
+    _ensure_alimentos_fts,
+    _ensure_lista_compra_schema,
+    _migracion_indices,
+    _migracion_versiones,
+    _migracion_fechas_iso,
+)
+VERSION_ESQUEMA = len(MIGRACIONES)
+
+
+def pragmas_perfil(perfil: str | None = None) -> dict:
+    perfil = perfil or PERFIL
+    if perfil not in PERFILES:
+        raise ValueError(f"Perfil de almacenamiento desconocido: {perfil} (opciones: {', '.join(PERFILES)})")
+    return PERFILES[perfil]
+
+
+def aplicar_perfil(connection: sqlite3.Connection, perfil: str | None = None) -> None:
+    for pragma, valor in pragmas_perfil(perfil).items():
+        connection.execute(f"PRAGMA {pragma} = {valor}").fetchall()
+
+
+def checkpoint(modo: str = "PASSIVE") -> dict:
+    if modo not in {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}:
+        raise ValueError(f"Modo de checkpoint desconocido: {modo}")
+    with get_connection() as connection:
+        ocupado, paginas_wal, paginas_copiadas = connection.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+    return {"modo": modo, "ocupado": bool(ocupado), "paginas_wal": paginas_wal, "paginas_copiadas": paginas_copiadas}
+
+
+def vacuum() -> None:
+    # alimentos no tiene un alias INTEGER PRIMARY KEY: VACUUM puede renumerar
+    # sus rowid, que son la clave de alimentos_fts y del cursor de /alimentos.
+    with get_connection() as connection:
+        connection.execute("VACUUM")
+        connection.execute("INSERT INTO alimentos_fts (alimentos_fts) VALUES ('rebuild')")
+        connection.execute(
+            f"UPDATE versiones SET version = version + 1, modificado = {AHORA_SQL} WHERE tabla = 'alimentos'"
         )
-        connection.commit()
+
+
+def normalizar_nombre(texto: str | None) -> str:
+    return (texto or "").strip().lower()
+
+
+def normalizar_fecha(fecha: str) -> str:
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(fecha.strip(), formato).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no válida: {fecha}")
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    init_db()
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH, POOL_SIZE, POOL_TIMEOUT)
+        return _pool
+
+
+def _ejecutores() -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _lectores, _escritor
+    with _pool_lock:
+        if _lectores is None:
+            _lectores = ThreadPoolExecutor(max_workers=max(POOL_SIZE - 1, 1), thread_name_prefix="befitlab-lector")
+        if _escritor is None:
+            _escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="befitlab-escritor")
+        return _lectores, _escritor
+
+
+async def _ejecutar(executor: ThreadPoolExecutor, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    contexto = contextvars.copy_context()
+    llamada = functools.partial(contexto.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, llamada)
+
+
+async def leer(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await _ejecutar(_ejecutores()[0], fn, *args, **kwargs)
+
+
+async def escribir(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await _ejecutar(_ejecutores()[1], fn, *args, **kwargs)
+
+
+def enviar_escritura(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    return _ejecutores()[1].submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def cerrar_conexiones() -> None:
+    global _pool, _esquema_listo, _lectores, _escritor
+    with _pool_lock:
+        ejecutores = [executor for executor in (_lectores, _escritor) if executor is not None]
+        _lectores = None
+        _escritor = None
+    for executor in ejecutores:
+        executor.shutdown(wait=True)
+    with _pool_lock:
+        if _pool is not None:
+            connection = _pool.adquirir()
+            try:
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            except sqlite3.Error:
+                pass
+            finally:
+                _pool.liberar(connection)
+            _pool.cerrar()
+        _pool = None
+    with _esquema_lock:
+        _esquema_listo = False
 
 
 @contextmanager
 def get_connection():
-    init_db()
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
+    connection = getattr(_local, "connection", None)
+    if connection is not None:
+        yield connection
+        return
+    pool = _get_pool()
+    connection = pool.adquirir()
+    connection.set_trace_callback(_trazar_consulta if _consultas.get() is not None else None)
+    _local.connection = connection
     try:
         yield connection
         connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
     finally:
-        connection.close()
+        _local.connection = None
+        pool.liberar(connection)
@@ -1,9 +1,16 @@
+import json
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
+from email.utils import formatdate
+from typing import Any, AsyncIterator, Callable, Iterator
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
-from . import crud
+from . import crud, db
+from .metricas import MetricasMiddleware, metricas
 from .schemas import (
     AlimentoCreate,
     ComidaCreate,
@@ -11,6 +18,7 @@ from .schemas import (
     ConsumoUpdate,
     DiaCreate,
     GeneracionRequest,
+    GeneracionSemanaRequest,
     GolosinaRequest,
     ObjetivoDia,
     PerfilUpdate,
@@ -19,92 +27,246 @@ from .schemas import (
     SustitucionRequest,
 )
 from .services.generator import (
+    ContextoGeneracion,
+    crear_contexto,
+    evaluar_menu,
     generar_menu_dia,
     recalcular_por_golosina,
     registrar_faltantes,
     sustituir_item as sustituir_item_generador,
 )
-from .services.learning import registrar_evento
-from .services.stats import resumen_dia
-
-
-app = FastAPI(title="BeFitLab API")
+from .services.importacion import importar_alimentos
+from .services.learning import cerrar_registro, registrar_evento
+from .services.stats import dia_completo, resumen_dias, resumen_semana
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    db.init_db()
+    await db.escribir(crud.ensure_objetivos)
+    yield
+    cerrar_registro()
+    db.cerrar_conexiones()
+
+
+app = FastAPI(title="BeFitLab API", lifespan=lifespan)
+app.add_middleware(MetricasMiddleware)
+
+COMIDAS_DIA = ["Desayuno", "Media mañana", "Almuerzo", "Merienda", "Cena"]
+
+TABLAS_DIA = ("dias", "comidas", "comida_items", "consumo", "objetivos_dia")
+
+
+async def _respuesta_condicional(
+    request: Request,
+    tablas: tuple[str, ...],
+    calcular: Callable[[], Any],
+    variante: str = "",
+    headers: dict[str, str] | None = None,
+) -> Response:
+    candidatos = {valor.strip() for valor in request.headers.get("if-none-match", "").split(",")}
+
+    def leer() -> tuple[dict[str, str], Any]:
+        with db.get_connection():
+            etag, modificado = db.estado_datos(tablas, variante)
+            cabeceras = {
+                "ETag": etag,
+                "Last-Modified": formatdate(modificado, usegmt=True),
+                "Cache-Control": "no-cache",
+            }
+            if etag in candidatos or "*" in candidatos:
+                return cabeceras, None
+            return cabeceras, calcular()
+
+    cabeceras, contenido = await db.leer(leer)
+    if cabeceras["ETag"] in candidatos or "*" in candidatos:
+        return Response(status_code=304, headers=cabeceras)
+    if isinstance(contenido, Response):
+        contenido.headers.update(cabeceras)
+        return contenido
+    return JSONResponse(jsonable_encoder(contenido), headers={**cabeceras, **(headers or {})})
+
+
+@app.get("/metrics", include_in_schema=False)
+async def exportar_metricas():
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/mantenimiento/vacuum")
+async def compactar_base_datos():
+    await db.escribir(db.vacuum)
+    return {"status": "ok"}
 
 
 @app.post("/alimentos")
-def crear_alimento(alimento: AlimentoCreate):
-    crud.add_alimento(alimento.model_dump())
+async def crear_alimento(alimento: AlimentoCreate):
+    await db.escribir(crud.add_alimento, alimento.model_dump())
     return {"status": "ok"}
 
 
+@app.post("/alimentos/bulk")
+async def crear_alimentos_bulk(request: Request, delimitador: str = ","):
+    if len(delimitador) != 1:
+        raise HTTPException(status_code=400, detail="El delimitador debe ser un único carácter")
+    content_type = request.headers.get("content-type", "")
+    try:
+        resultado = await importar_alimentos(request.stream(), content_type, delimitador)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    await db.escribir(db.checkpoint)
+    return resultado
+
+
+TAMANO_PAGINA_STREAM = 500
+
+
+def _pagina_json(cursor: int | None, campos, rol_principal, grupo_funcional) -> tuple[bytes, int | None]:
+    alimentos, siguiente = crud.list_alimentos_pagina(
+        TAMANO_PAGINA_STREAM, cursor, campos, rol_principal, grupo_funcional
+    )
+    trozo = ",".join(json.dumps(alimento, ensure_ascii=False) for alimento in alimentos)
+    return trozo.encode("utf-8"), siguiente
+
+
+async def _json_array(campos, rol_principal, grupo_funcional) -> AsyncIterator[bytes]:
+    separador = b"["
+    cursor = None
+    while True:
+        trozo, cursor = await db.leer(_pagina_json, cursor, campos, rol_principal, grupo_funcional)
+        if trozo:
+            yield separador + trozo
+            separador = b","
+        if cursor is None:
+            break
+    yield b"[]" if separador == b"[" else b"]"
+
+
+@app.get("/alimentos/buscar")
+async def buscar_alimentos(
+    request: Request,
+    q: str = Query(min_length=1),
+    limit: int = Query(default=20, ge=1, le=200),
+):
+    return await _respuesta_condicional(request, ("alimentos",), lambda: crud.buscar_alimentos(q, limit))
+
+
 @app.get("/alimentos")
-def listar_alimentos():
-    return crud.list_alimentos()
+async def listar_alimentos(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    cursor: int | None = Query(
+        default=None,
+        ge=0,
+        description="Valor de X-Siguiente-Cursor. Es el rowid de alimentos y deja de valer tras POST /mantenimiento/vacuum.",
+    ),
+    fields: str | None = None,
+    rol_principal: str | None = None,
+    grupo_funcional: str | None = None,
+    stream: bool = False,
+):
+    campos = [campo.strip() for campo in fields.split(",") if campo.strip()] if fields else None
+    desconocidos = sorted(set(campos or []) - set(db.ALIMENTOS_COLUMNS))
+    if desconocidos:
+        raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(desconocidos)}")
+    if stream:
+        return StreamingResponse(
+            _json_array(campos, rol_principal, grupo_funcional), media_type="application/json"
+        )
+    if limit is None and cursor is None and not campos and not rol_principal and not grupo_funcional:
+        return await _respuesta_condicional(request, ("alimentos",), crud.list_alimentos)
+
+    def pagina() -> Response:
+        alimentos, siguiente = crud.list_alimentos_pagina(
+            limit or 1000, cursor, campos, rol_principal, grupo_funcional
+        )
+        headers = {"X-Siguiente-Cursor": str(siguiente)} if siguiente is not None else {}
+        return JSONResponse(alimentos, headers=headers)
+
+    return await _respuesta_condicional(request, ("alimentos",), pagina)
 
 
 @app.post("/dias")
-def crear_dia(dia: DiaCreate):
-    dia_id = crud.add_dia(dia.fecha, dia.tipo)
-    for nombre in ["Desayuno", "Media mañana", "Almuerzo", "Merienda", "Cena"]:
-        crud.add_comida(dia_id, nombre, nombre in {"Almuerzo", "Cena"})
-    return {"id": dia_id}
+async def crear_dia(dia: DiaCreate):
+    try:
+        fecha = db.normalizar_fecha(dia.fecha)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail="Fecha no válida") from exc
+
+    def guardar() -> int:
+        with db.get_connection():
+            dia_id = crud.add_dia(fecha, dia.tipo)
+            if not crud.list_comidas(dia_id):
+                for nombre in COMIDAS_DIA:
+                    crud.add_comida(dia_id, nombre, nombre in {"Almuerzo", "Cena"})
+        return dia_id
+
+    return {"id": await db.escribir(guardar)}
 
 
 @app.get("/dias")
-def listar_dias():
-    return crud.list_dias()
+async def listar_dias(request: Request):
+    return await _respuesta_condicional(request, ("dias",), crud.list_dias)
 
 
 @app.put("/dias/{dia_id}")
-def actualizar_dia(dia_id: str, dia: DiaCreate):
-    dias = [item for item in crud.list_dias() if item["id"] == dia_id]
-    if not dias:
-        raise HTTPException(status_code=404, detail="Día no encontrado")
-    crud.update_dia_tipo(dia_id, dia.tipo)
+async def actualizar_dia(dia_id: str, dia: DiaCreate):
+    def guardar() -> None:
+        dias = [item for item in crud.list_dias() if item["id"] == dia_id]
+        if not dias:
+            raise HTTPException(status_code=404, detail="Día no encontrado")
+        crud.update_dia_tipo(dia_id, dia.tipo)
+
+    await db.escribir(guardar)
     return {"status": "ok"}
 
 
 @app.delete("/dias/{dia_id}")
-def eliminar_dia(dia_id: str):
-    dias = [item for item in crud.list_dias() if item["id"] == dia_id]
-    if not dias:
-        raise HTTPException(status_code=404, detail="Día no encontrado")
-    crud.delete_dia(dia_id)
+async def eliminar_dia(dia_id: str):
+    def guardar() -> None:
+        dias = [item for item in crud.list_dias() if item["id"] == dia_id]
+        if not dias:
+            raise HTTPException(status_code=404, detail="Día no encontrado")
+        crud.delete_dia(dia_id)
+
+    await db.escribir(guardar)
     return {"status": "ok"}
 
 
 @app.post("/comidas")
-def crear_comida(comida: ComidaCreate):
-    comida_id = crud.add_comida(comida.dia_id, comida.nombre, comida.postre_obligatorio)
+async def crear_comida(comida: ComidaCreate):
+    comida_id = await db.escribir(crud.add_comida, comida.dia_id, comida.nombre, comida.postre_obligatorio)
     return {"id": comida_id}
 
 
 @app.get("/dias/{dia_id}/comidas")
-def listar_comidas(dia_id: str):
-    return crud.list_comidas(dia_id)
+async def listar_comidas(request: Request, dia_id: str):
+    return await _respuesta_condicional(request, ("comidas",), lambda: crud.list_comidas(dia_id))
+
+
+@app.get("/dias/{dia_id}/completo")
+async def obtener_dia_completo(request: Request, dia_id: str):
+    def calcular() -> dict:
+        completo = dia_completo(dia_id)
+        if completo is None:
+            raise HTTPException(status_code=404, detail="Día no encontrado")
+        return completo
+
+    return await _respuesta_condicional(request, TABLAS_DIA, calcular)
 
 
 @app.post("/comidas/{comida_id}/items")
-def crear_comida_item(item: ComidaItemCreate):
-    crud.add_comida_items([item.model_dump()])
+async def crear_comida_item(item: ComidaItemCreate):
+    await db.escribir(crud.add_comida_items, [item.model_dump()])
     return {"status": "ok"}
 
 
 @app.get("/comidas/{comida_id}/items")
-def listar_items(comida_id: int):
-    return crud.list_comida_items(comida_id)
+async def listar_items(request: Request, comida_id: int):
+    return await _respuesta_condicional(request, ("comida_items",), lambda: crud.list_comida_items(comida_id))
 
 
-@app.post("/generador")
-def generar_menu(request: GeneracionRequest):
-    comidas = crud.list_comidas(request.dia_id)
-    if not comidas:
-        raise HTTPException(status_code=404, detail="Día no encontrado")
-    dia = crud.get_dia(request.dia_id)
-    if not dia:
-        raise HTTPException(status_code=404, detail="Día no encontrado")
+def _guardar_menu(comidas: list[dict], menu: dict[str, list[dict]]) -> list[dict]:
     generadas = []
-    menu = generar_menu_dia(comidas, dia["tipo"])
     for comida in comidas:
         crud.clear_comida_items(comida["id"])
         items = menu.get(comida["nombre"], [])
@@ -112,136 +274,232 @@ def generar_menu(request: GeneracionRequest):
             item["comida_id"] = comida["id"]
             item["gramos_iniciales"] = item["gramos"]
         crud.add_comida_items(items)
-        registrar_faltantes(items)
         generadas.append({"comida": comida, "items": items})
-    registrar_evento("generar_menu", f"dia_id={request.dia_id}")
     return generadas
 
 
+def _items_generados(generadas: list[dict]) -> Iterator[dict]:
+    for generada in generadas:
+        yield from generada["items"]
+
+
+@app.post("/generador")
+async def generar_menu(request: GeneracionRequest):
+    def generar() -> tuple[list[dict], dict, dict, ContextoGeneracion]:
+        with db.get_connection():
+            comidas = crud.list_comidas(request.dia_id)
+            if not comidas:
+                raise HTTPException(status_code=404, detail="Día no encontrado")
+            dia = crud.get_dia(request.dia_id)
+            if not dia:
+                raise HTTPException(status_code=404, detail="Día no encontrado")
+            contexto = crear_contexto(request.semilla)
+        menu = generar_menu_dia(comidas, dia["tipo"], request.modo, contexto)
+        return comidas, menu, evaluar_menu(menu, contexto.objetivo(dia["tipo"])), contexto
+
+    comidas, menu, evaluacion, contexto = await db.leer(generar)
+
+    def guardar() -> list[dict]:
+        with db.get_connection():
+            if [comida["id"] for comida in crud.list_comidas(request.dia_id)] != [comida["id"] for comida in comidas]:
+                raise HTTPException(status_code=409, detail="Las comidas del día cambiaron durante la generación")
+            generadas = _guardar_menu(comidas, menu)
+            registrar_faltantes(_items_generados(generadas), contexto)
+        registrar_evento("generar_menu", f"dia_id={request.dia_id}")
+        return generadas
+
+    return {"comidas": await db.escribir(guardar), **evaluacion}
+
+
+@app.post("/generador/semana")
+async def generar_semana(request: GeneracionSemanaRequest):
+    try:
+        inicio = datetime.strptime(request.fecha_inicio, "%d/%m/%Y").date()
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail="Fecha no válida") from exc
+
+    def generar() -> tuple[str, list[dict[str, list[dict]]], ContextoGeneracion]:
+        contexto = crear_contexto(request.semilla)
+        tipo = request.tipo or contexto.default_tipo
+        plantilla = [{"nombre": nombre} for nombre in COMIDAS_DIA]
+        return tipo, [generar_menu_dia(plantilla, tipo, request.modo, contexto) for _ in range(request.dias)], contexto
+
+    tipo, menus, contexto = await db.leer(generar)
+
+    def guardar() -> list[dict]:
+        plan = []
+        with db.get_connection():
+            for offset, menu in enumerate(menus):
+                fecha = (inicio + timedelta(days=offset)).isoformat()
+                dia_id = crud.add_dia(fecha, tipo)
+                comidas = crud.list_comidas(dia_id)
+                if not comidas:
+                    for nombre in COMIDAS_DIA:
+                        crud.add_comida(dia_id, nombre, nombre in {"Almuerzo", "Cena"})
+                    comidas = crud.list_comidas(dia_id)
+                plan.append(
+                    {
+                        "dia": {"id": dia_id, "fecha": fecha, "tipo": tipo},
+                        "comidas": _guardar_menu(comidas, menu),
+                        **evaluar_menu(menu, contexto.objetivo(tipo)),
+                    }
+                )
+            registrar_faltantes(
+                (item for dia in plan for item in _items_generados(dia["comidas"])), contexto
+            )
+        registrar_evento("generar_semana", f"desde={request.fecha_inicio} dias={request.dias}")
+        return plan
+
+    return await db.escribir(guardar)
+
+
 @app.post("/golosinas")
-def agregar_golosina(request: GolosinaRequest):
+async def agregar_golosina(request: GolosinaRequest):
     item = request.model_dump()
     item["gramos_iniciales"] = request.gramos
-    item_id = crud.add_golosina(item)
-    recalcular_por_golosina(request.comida_id, item)
-    registrar_evento("agregar_golosina", f"item_id={item_id}")
-    return {"id": item_id}
+
+    def guardar() -> int:
+        item_id = crud.add_golosina(item)
+        recalcular_por_golosina(request.comida_id, item)
+        registrar_evento("agregar_golosina", f"item_id={item_id}")
+        return item_id
+
+    return {"id": await db.escribir(guardar)}
 
 
 @app.post("/sustituciones")
-def sustituir_item(request: SustitucionRequest):
-    item = crud.get_comida_item(request.comida_item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item no encontrado")
-    nuevo = sustituir_item_generador(item)
-    if not nuevo:
-        raise HTTPException(status_code=400, detail="No hay sustituciones disponibles")
-    registrar_evento("sustituir_alimento", f"item_id={request.comida_item_id}")
-    return nuevo
+async def sustituir_item(request: SustitucionRequest):
+    def sustituir() -> dict:
+        item = crud.get_comida_item(request.comida_item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Item no encontrado")
+        nuevo = sustituir_item_generador(item)
+        if not nuevo:
+            raise HTTPException(status_code=400, detail="No hay sustituciones disponibles")
+        registrar_evento("sustituir_alimento", f"item_id={request.comida_item_id}")
+        return nuevo
+
+    return await db.escribir(sustituir)
 
 
 @app.post("/consumo")
-def confirmar_consumo(update: ConsumoUpdate):
-    crud.record_consumo(update.comida_item_id, update.estado, update.gramos)
-    registrar_evento(update.estado, f"item_id={update.comida_item_id}")
+async def confirmar_consumo(update: ConsumoUpdate):
+    def guardar() -> None:
+        crud.record_consumo(update.comida_item_id, update.estado, update.gramos)
+        registrar_evento(update.estado, f"item_id={update.comida_item_id}")
+
+    await db.escribir(guardar)
     return {"status": "ok"}
 
 
 @app.get("/estadisticas/{dia_id}")
-def estadisticas_dia(dia_id: str):
-    dias = [dia for dia in crud.list_dias() if dia["id"] == dia_id]
-    if not dias:
-        raise HTTPException(status_code=404, detail="Día no encontrado")
-    return resumen_dia(dias[0])
+async def estadisticas_dia(request: Request, dia_id: str):
+    def calcular() -> dict:
+        resumen = resumen_dias([dia_id]).get(dia_id)
+        if resumen is None:
+            raise HTTPException(status_code=404, detail="Día no encontrado")
+        return resumen
+
+    return await _respuesta_condicional(request, TABLAS_DIA, calcular)
+
+
+@app.get("/dashboard/semana")
+async def dashboard_semana(
+    request: Request,
+    desde: date | None = None,
+    dias: int = Query(default=7, ge=1, le=31),
+):
+    desde = desde or date.today()
+    return await _respuesta_condicional(
+        request, TABLAS_DIA, lambda: resumen_semana(desde, dias), variante=desde.isoformat()
+    )
 
 
 @app.get("/despensa")
-def listar_despensa(estado: str = "disponible"):
-    return crud.list_despensa(estado)
+async def listar_despensa(request: Request, estado: str = "disponible"):
+    return await _respuesta_condicional(request, ("despensa",), lambda: crud.list_despensa(estado))
 
 
 @app.post("/despensa")
-def actualizar_despensa(update: PantryUpdate):
+async def actualizar_despensa(update: PantryUpdate):
     ean = update.ean.strip() if update.ean else ""
     if not ean:
         ean = f"MANUAL-{uuid4().hex[:8]}"
-    crud.upsert_despensa(ean, update.nombre, update.estado)
+    await db.escribir(crud.upsert_despensa, ean, update.nombre, update.estado)
     return {"status": "ok"}
 
 
 @app.get("/lista-compra")
-def listar_compra():
-    return crud.list_lista_compra()
+async def listar_compra(request: Request):
+    return await _respuesta_condicional(request, ("lista_compra",), crud.list_lista_compra)
 
 
 @app.post("/lista-compra")
-def actualizar_compra(update: ShoppingUpdate):
-    crud.update_lista_compra(update.item_id, update.comprado)
-    if update.comprado:
-        item = crud.get_lista_compra_item(update.item_id)
-        if item:
-            ean = item["ean"] or f"MANUAL-{uuid4().hex[:8]}"
-            crud.upsert_despensa(ean, item["nombre"], "disponible")
-            crud.delete_lista_compra_item(update.item_id)
+async def actualizar_compra(update: ShoppingUpdate):
+    def guardar() -> None:
+        with db.get_connection():
+            crud.update_lista_compra(update.item_id, update.comprado)
+            if update.comprado:
+                item = crud.get_lista_compra_item(update.item_id)
+                if item:
+                    ean = item["ean"] or f"MANUAL-{uuid4().hex[:8]}"
+                    crud.upsert_despensa(ean, item["nombre"], "disponible")
+                    crud.delete_lista_compra_item(update.item_id)
+
+    await db.escribir(guardar)
     return {"status": "ok"}
 
 
 @app.get("/lista-compra/auto")
-def listar_compra_auto(rango_dias: int = 7):
-    dias = crud.list_dias()
-    disponibles = crud.list_despensa("disponible")
-    disponibles_ean = {item["ean"] for item in disponibles if item.get("ean")}
-    disponibles_nombres = {item["nombre"].strip().lower() for item in disponibles if item.get("nombre")}
+async def listar_compra_auto(request: Request, rango_dias: int = 7):
     hoy = date.today()
     limite = hoy + timedelta(days=max(rango_dias, 1) - 1)
-    acumulados: dict[tuple[str, str], float] = {}
-    for dia in dias:
-        fecha = datetime.strptime(dia["fecha"], "%d/%m/%Y").date()
-        if fecha < hoy or fecha > limite:
-            continue
-        comidas = crud.list_comidas(dia["id"])
-        for comida in comidas:
-            items = crud.list_comida_items(comida["id"])
-            for item in items:
-                ean = item.get("ean") or ""
-                nombre = item.get("nombre") or ""
-                key = (ean, nombre)
-                acumulados[key] = acumulados.get(key, 0) + float(item.get("gramos", 0))
-    lista = []
-    for (ean, nombre), gramos in acumulados.items():
-        if ean and ean in disponibles_ean:
-            continue
-        if not ean and nombre.strip().lower() in disponibles_nombres:
-            continue
-        lista.append({"ean": ean or None, "nombre": nombre, "gramos": round(gramos, 1)})
-    lista.sort(key=lambda item: (item["nombre"] or "").lower())
-    return lista
+
+    def calcular() -> list[dict]:
+        lista = [
+            {"ean": item["ean"] or None, "nombre": item["nombre"], "gramos": round(float(item["gramos"] or 0), 1)}
+            for item in crud.list_faltantes_compra(hoy, limite)
+        ]
+        lista.sort(key=lambda item: (item["nombre"] or "").lower())
+        return lista
+
+    return await _respuesta_condicional(
+        request, ("dias", "comidas", "comida_items", "despensa"), calcular, variante=hoy.isoformat()
+    )
 
 
 @app.get("/perfil")
-def obtener_perfil():
-    objetivos = crud.list_objetivos()
-    return {"default_tipo": crud.get_default_tipo(), "objetivos": objetivos}
+async def obtener_perfil(request: Request):
+    def calcular() -> dict:
+        objetivos = crud.list_objetivos()
+        return {"default_tipo": crud.get_default_tipo(), "objetivos": objetivos}
+
+    return await _respuesta_condicional(request, ("objetivos_dia", "ajustes_app"), calcular)
 
 
 @app.put("/perfil")
-def actualizar_perfil(payload: PerfilUpdate):
-    if payload.default_tipo:
-        crud.set_default_tipo(payload.default_tipo)
-    for objetivo in payload.objetivos:
-        crud.upsert_objetivo(
-            objetivo.tipo,
-            objetivo.kcal,
-            objetivo.proteina,
-            objetivo.hidratos,
-            objetivo.grasas,
-        )
+async def actualizar_perfil(payload: PerfilUpdate):
+    def guardar() -> None:
+        with db.get_connection():
+            if payload.default_tipo:
+                crud.set_default_tipo(payload.default_tipo)
+            for objetivo in payload.objetivos:
+                crud.upsert_objetivo(
+                    objetivo.tipo,
+                    objetivo.kcal,
+                    objetivo.proteina,
+                    objetivo.hidratos,
+                    objetivo.grasas,
+                )
+
+    await db.escribir(guardar)
     return {"status": "ok"}
 
 
 @app.post("/perfil/objetivos")
-def crear_objetivo(payload: ObjetivoDia):
-    crud.upsert_objetivo(
+async def crear_objetivo(payload: ObjetivoDia):
+    await db.escribir(
+        crud.upsert_objetivo,
         payload.tipo,
         payload.kcal,
         payload.proteina,
@@ -252,6 +510,6 @@ def crear_objetivo(payload: ObjetivoDia):
 
 
 @app.delete("/perfil/objetivos/{tipo}")
-def eliminar_objetivo(tipo: str):
-    crud.delete_objetivo(tipo)
+async def eliminar_objetivo(tipo: str):
+    await db.escribir(crud.delete_objetivo, tipo)
     return {"status": "ok"}
@@ -0,0 +1,174 @@
+import threading
+import time
+from bisect import bisect_left
+
+from . import db
+
+
+LATENCIA_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TAMANO_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+SIN_RUTA = "sin_ruta"
+
+
+class Histograma:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.conteos[bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre: str, etiquetas: str) -> list[str]:
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {self.total}')
+        lineas.append(f"{nombre}_sum{{{etiquetas}}} {self.suma}")
+        lineas.append(f"{nombre}_count{{{etiquetas}}} {self.total}")
+        return lineas
+
+
+class Metricas:
+    def __init__(self) -> None:
+        self.en_curso = 0
+        self.latencias: dict[tuple[str, str], Histograma] = {}
+        self.tiempo_db: dict[tuple[str, str], float] = {}
+        self.consultas: dict[tuple[str, str], int] = {}
+        self.tamanos: dict[tuple[str, str], Histograma] = {}
+        self.peticiones: dict[tuple[str, str, str], int] = {}
+        self.errores: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def iniciar(self) -> None:
+        with self._lock:
+            self.en_curso += 1
+
+    def registrar(
+        self,
+        metodo: str,
+        ruta: str,
+        estado: int,
+        segundos: float,
+        segundos_db: float,
+        consultas: int,
+        tamano: int,
+    ) -> None:
+        clave = (metodo, ruta)
+        with self._lock:
+            self.en_curso -= 1
+            self.latencias.setdefault(clave, Histograma(LATENCIA_BUCKETS)).observar(segundos)
+            self.tamanos.setdefault(clave, Histograma(TAMANO_BUCKETS)).observar(tamano)
+            self.tiempo_db[clave] = self.tiempo_db.get(clave, 0.0) + segundos_db
+            self.consultas[clave] = self.consultas.get(clave, 0) + consultas
+            self.peticiones[(metodo, ruta, str(estado))] = self.peticiones.get((metodo, ruta, str(estado)), 0) + 1
+            if estado >= 500:
+                self.errores[clave] = self.errores.get(clave, 0) + 1
+
+    def exportar(self) -> str:
+        with self._lock:
+            lineas = [
+                "# HELP befitlab_http_en_curso Peticiones HTTP en curso.",
+                "# TYPE befitlab_http_en_curso gauge",
+                f"befitlab_http_en_curso {self.en_curso}",
+                "# HELP befitlab_http_peticiones_total Peticiones HTTP atendidas.",
+                "# TYPE befitlab_http_peticiones_total counter",
+            ]
+            for (metodo, ruta, estado), total in sorted(self.peticiones.items()):
+                lineas.append(
+                    f'befitlab_http_peticiones_total{{{_etiquetas(metodo, ruta)},estado="{estado}"}} {total}'
+                )
+            lineas += [
+                "# HELP befitlab_http_errores_total Respuestas 5xx y excepciones no controladas.",
+                "# TYPE befitlab_http_errores_total counter",
+            ]
+            for (metodo, ruta), total in sorted(self.errores.items()):
+                lineas.append(f"befitlab_http_errores_total{{{_etiquetas(metodo, ruta)}}} {total}")
+            lineas += [
+                "# HELP befitlab_http_latencia_segundos Latencia de las peticiones HTTP.",
+                "# TYPE befitlab_http_latencia_segundos histogram",
+            ]
+            for (metodo, ruta), histograma in sorted(self.latencias.items()):
+                lineas += histograma.lineas("befitlab_http_latencia_segundos", _etiquetas(metodo, ruta))
+            lineas += [
+                "# HELP befitlab_http_db_segundos_total Tiempo acumulado en SQLite por ruta.",
+                "# TYPE befitlab_http_db_segundos_total counter",
+            ]
+            for (metodo, ruta), segundos in sorted(self.tiempo_db.items()):
+                lineas.append(f"befitlab_http_db_segundos_total{{{_etiquetas(metodo, ruta)}}} {segundos}")
+            lineas += [
+                "# HELP befitlab_http_consultas_total Sentencias SQL ejecutadas por ruta.",
+                "# TYPE befitlab_http_consultas_total counter",
+            ]
+            for (metodo, ruta), total in sorted(self.consultas.items()):
+                lineas.append(f"befitlab_http_consultas_total{{{_etiquetas(metodo, ruta)}}} {total}")
+            lineas += [
+                "# HELP befitlab_http_respuesta_bytes Tamaño del cuerpo de las respuestas HTTP.",
+                "# TYPE befitlab_http_respuesta_bytes histogram",
+            ]
+            for (metodo, ruta), histograma in sorted(self.tamanos.items()):
+                lineas += histograma.lineas("befitlab_http_respuesta_bytes", _etiquetas(metodo, ruta))
+        return "\n".join(lineas) + "\n"
+
+
+def _etiquetas(metodo: str, ruta: str) -> str:
+    ruta = ruta.replace("\\", "\\\\").replace('"', '\\"')
+    return f'metodo="{metodo}",ruta="{ruta}"'
+
+
+metricas = Metricas()
+
+
+class MetricasMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        estado = 500
+        tamano = 0
+        metricas.iniciar()
+        with db.medir_tiempo_db() as tiempo_db, db.contar_consultas() as consultas:
+
+            async def enviar(mensaje) -> None:
+                nonlocal estado, tamano
+                if mensaje["type"] == "http.response.start":
+                    estado = mensaje["status"]
+                    total = time.perf_counter() - inicio
+                    cabecera = (
+                        f"db;dur={tiempo_db[0] * 1000:.2f}, "
+                        f"app;dur={max(total - tiempo_db[0], 0) * 1000:.2f}, "
+                        f"total;dur={total * 1000:.2f}"
+                    )
+                    repetida = max(db.consultas_repetidas(consultas).values(), default=0)
+                    mensaje["headers"] = [
+                        *mensaje.get("headers", []),
+                        (b"server-timing", cabecera.encode("latin-1")),
+                        (b"x-query-count", str(len(consultas)).encode("latin-1")),
+                        (b"x-query-max-repeticiones", str(repetida).encode("latin-1")),
+                    ]
+                elif mensaje["type"] == "http.response.body":
+                    tamano += len(mensaje.get("body", b""))
+                await send(mensaje)
+
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                ruta = getattr(scope.get("route"), "path", SIN_RUTA)
+                metricas.registrar(
+                    scope["method"],
+                    ruta,
+                    estado,
+                    time.perf_counter() - inicio,
+                    tiempo_db[0],
+                    len(consultas),
+                    tamano,
+                )
@@ -45,6 +45,16 @@ class ComidaItemCreate(BaseModel):
 
 class GeneracionRequest(BaseModel):
     dia_id: str
+    modo: str = Field(default="solver", pattern="^(solver|ajuste)$")
+    semilla: int | None = None
+
+
+class GeneracionSemanaRequest(BaseModel):
+    fecha_inicio: str = Field(pattern="^\\d{2}/\\d{2}/\\d{4}$")
+    dias: int = Field(default=7, ge=1, le=62)
+    tipo: str | None = Field(default=None, pattern="^(Entreno|Descanso)$")
+    modo: str = Field(default="solver", pattern="^(solver|ajuste)$")
+    semilla: int | None = None
 
 
 class GolosinaRequest(BaseModel):
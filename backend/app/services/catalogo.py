@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Hashable
+
+from ..clasificacion import clasificar
+from ..crud import list_alimentos_catalogo
+from ..db import versiones_datos
+
+
+class AlimentoIndex:
+    def __init__(self, alimentos: list[dict], version: int) -> None:
+        self.version = version
+        self.todos = alimentos
+        self.por_ean: dict[str, dict] = {}
+        self.por_rol: dict[str, list[dict]] = defaultdict(list)
+        self.por_grupo: dict[str, list[dict]] = defaultdict(list)
+        self.por_subgrupo: dict[str, list[dict]] = defaultdict(list)
+        self._posicion: dict[int, int] = {}
+        for posicion, alimento in enumerate(alimentos):
+            self._posicion[id(alimento)] = posicion
+            if alimento.get("clasificacion") is None:
+                alimento["clasificacion"] = clasificar(alimento)
+            if alimento.get("ean"):
+                self.por_ean[alimento["ean"]] = alimento
+            self.por_rol[str(alimento.get("rol_principal", "")).lower()].append(alimento)
+            self.por_grupo[str(alimento.get("grupo_funcional", "")).lower()].append(alimento)
+            self.por_subgrupo[str(alimento.get("subgrupo_funcional", "")).lower()].append(alimento)
+        self._derivados: dict[Hashable, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def derivado(self, clave: Hashable, calcular: Callable[[], list[dict]]) -> list[dict]:
+        resultado = self._derivados.get(clave)
+        if resultado is None:
+            resultado = calcular()
+            with self._lock:
+                self._derivados[clave] = resultado
+        return resultado
+
+    def por_rol_parcial(self, rol: str) -> list[dict]:
+        rol_lower = rol.lower()
+
+        def calcular() -> list[dict]:
+            claves = [clave for clave in self.por_rol if rol_lower in clave]
+            if len(claves) == 1:
+                return self.por_rol[claves[0]]
+            candidatos = [alimento for clave in claves for alimento in self.por_rol[clave]]
+            candidatos.sort(key=lambda alimento: self._posicion[id(alimento)])
+            return candidatos
+
+        return self.derivado(("rol", rol_lower), calcular)
+
+    def por_clasificacion(self, mascara: int) -> list[dict]:
+        return self.derivado(
+            ("clasificacion", mascara),
+            lambda: [alimento for alimento in self.todos if alimento["clasificacion"] & mascara],
+        )
+
+
+_indice: AlimentoIndex | None = None
+_indice_lock = threading.Lock()
+
+
+def obtener_indice(version: int | None = None) -> AlimentoIndex:
+    global _indice
+    if version is None:
+        version = versiones_datos(("alimentos",))["alimentos"]
+    indice = _indice
+    if indice is not None and indice.version == version:
+        return indice
+    with _indice_lock:
+        if _indice is None or _indice.version != version:
+            _indice = AlimentoIndex(list_alimentos_catalogo(), version)
+        return _indice
@@ -1,14 +1,25 @@
+import copy
+import os
 import random
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Hashable, Iterable
 
 from ..crud import (
-    add_lista_compra,
+    get_default_tipo,
     get_objetivo,
-    list_alimentos,
     list_comida_items,
     list_despensa,
+    list_objetivos,
     update_comida_item,
     update_comida_item_detalle,
+    upsert_lista_compra,
 )
+from ..clasificacion import CEREAL_PAN, DESAYUNO_SNACK, POSTRE
+from ..db import clave_lista_compra, get_connection, versiones_datos
+from .catalogo import AlimentoIndex, obtener_indice
+from .solver import MACROS, error_macros, resolver_porciones
 
 
 MEAL_ORDER = [
@@ -20,7 +31,8 @@ MEAL_ORDER = [
 ]
 
 
-POSTRE_VALIDO = {"lácteos", "fruta", "otros", "chocolate", "chocolate negro"}
+INTENTOS_SOLVER = 3
+MEMO_MENUS = int(os.environ.get("BEFITLAB_GENERADOR_MEMO", "256"))
 
 MEAL_WEIGHTS = {
     "Desayuno": 0.22,
@@ -31,77 +43,108 @@ MEAL_WEIGHTS = {
 }
 
 
-def objetivos_por_tipo(tipo: str) -> dict:
-    objetivo = get_objetivo(tipo)
-    return {
-        "kcal": objetivo["kcal"],
-        "proteina": objetivo["proteina"],
-        "hidratos": objetivo["hidratos"],
-        "grasas": objetivo["grasas"],
-    }
+_aleatorio_global = random.Random()
+
+
+class MemoMenus:
+    def __init__(self, capacidad: int) -> None:
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._menus: OrderedDict[Hashable, dict[str, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Hashable) -> dict[str, list[dict]] | None:
+        with self._lock:
+            menu = self._menus.get(clave)
+            if menu is None:
+                self.fallos += 1
+                return None
+            self._menus.move_to_end(clave)
+            self.aciertos += 1
+        return copy.deepcopy(menu)
+
+    def guardar(self, clave: Hashable, menu: dict[str, list[dict]]) -> None:
+        if self.capacidad <= 0:
+            return
+        menu = copy.deepcopy(menu)
+        with self._lock:
+            self._menus[clave] = menu
+            self._menus.move_to_end(clave)
+            while len(self._menus) > self.capacidad:
+                self._menus.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._menus.clear()
+
+
+memo_menus = MemoMenus(MEMO_MENUS)
+
+
+@dataclass(frozen=True)
+class ContextoGeneracion:
+    disponibles: frozenset[str]
+    objetivos: dict[str, dict]
+    default_tipo: str
+    version_catalogo: int = 0
+    version_despensa: int = 0
+    semilla: int | None = None
+    aleatorio: random.Random = field(default_factory=random.Random, compare=False, repr=False)
+    indice: AlimentoIndex | None = field(default=None, compare=False, repr=False)
+
+    def objetivo(self, tipo: str) -> dict:
+        objetivo = self.objetivos.get(tipo) or get_objetivo(tipo)
+        return {
+            "kcal": objetivo["kcal"],
+            "proteina": objetivo["proteina"],
+            "hidratos": objetivo["hidratos"],
+            "grasas": objetivo["grasas"],
+        }
 
 
-def _alimentos_por_rol(rol: str) -> list[dict]:
-    alimentos = list_alimentos()
-    rol_lower = rol.lower()
-    candidatos = []
-    for alimento in alimentos:
-        rol_principal = str(alimento.get("rol_principal", "")).lower()
-        if rol_lower in rol_principal:
-            candidatos.append(alimento)
-    return candidatos
+def crear_contexto(semilla: int | None = None) -> ContextoGeneracion:
+    with get_connection():
+        versiones = versiones_datos(("alimentos", "despensa"))
+        return ContextoGeneracion(
+            disponibles=frozenset(despensa_disponible()),
+            objetivos={objetivo["tipo"]: objetivo for objetivo in list_objetivos()},
+            default_tipo=get_default_tipo(),
+            version_catalogo=versiones["alimentos"],
+            version_despensa=versiones["despensa"],
+            semilla=semilla,
+            aleatorio=random.Random(semilla),
+            indice=obtener_indice(versiones["alimentos"]),
+        )
 
 
-def _despensa_disponible() -> set[str]:
-    disponibles = list_despensa("disponible")
-    return {item["ean"] for item in disponibles if item["ean"]}
+def _aleatorio(contexto: ContextoGeneracion | None) -> random.Random:
+    return contexto.aleatorio if contexto else _aleatorio_global
 
 
-def _texto_grupo(alimento: dict) -> str:
-    grupo = str(alimento.get("grupo_funcional", "")).lower()
-    subgrupo = str(alimento.get("subgrupo_funcional", "")).lower()
-    return f"{grupo} {subgrupo}".strip()
+def objetivos_por_tipo(tipo: str, contexto: ContextoGeneracion | None = None) -> dict:
+    return (contexto or crear_contexto()).objetivo(tipo)
 
 
-def _es_cereal_o_pan(alimento: dict) -> bool:
-    texto = _texto_grupo(alimento)
-    return "cereal" in texto or "pan" in texto
-
+def _indice(contexto: ContextoGeneracion | None) -> AlimentoIndex:
+    return contexto.indice if contexto and contexto.indice else obtener_indice()
 
-def _es_lacteo(alimento: dict) -> bool:
-    texto = _texto_grupo(alimento)
-    return "lácte" in texto or "lacte" in texto
 
+def _alimentos_por_rol(rol: str, contexto: ContextoGeneracion | None = None) -> list[dict]:
+    return _indice(contexto).por_rol_parcial(rol)
 
-def _es_fruta(alimento: dict) -> bool:
-    texto = _texto_grupo(alimento)
-    return "fruta" in texto
 
+def despensa_disponible() -> set[str]:
+    disponibles = list_despensa("disponible")
+    return {item["ean"] for item in disponibles if item["ean"]}
 
-def _es_huevo(alimento: dict) -> bool:
-    texto = _texto_grupo(alimento)
-    nombre = alimento.get("nombre", "").lower()
-    return "huevo" in texto or "huevo" in nombre
 
+def _es_cereal_o_pan(alimento: dict) -> bool:
+    return bool(alimento["clasificacion"] & CEREAL_PAN)
 
-def _es_embutido(alimento: dict) -> bool:
-    texto = _texto_grupo(alimento)
-    return "embutido" in texto
 
-
-def _candidatos_desayuno_snack(comida: str) -> list[dict]:
-    candidatos = []
-    for alimento in list_alimentos():
-        if (
-            _es_lacteo(alimento)
-            or _es_fruta(alimento)
-            or _es_cereal_o_pan(alimento)
-            or _es_huevo(alimento)
-            or _es_embutido(alimento)
-            or "proteina" in str(alimento.get("rol_principal", "")).lower()
-        ):
-            candidatos.append(alimento)
-    return candidatos
+def _candidatos_desayuno_snack(comida: str, contexto: ContextoGeneracion | None = None) -> list[dict]:
+    return _indice(contexto).por_clasificacion(DESAYUNO_SNACK)
 
 def _seleccionar_alimento(
     rol: str,
@@ -109,23 +152,31 @@ def _seleccionar_alimento(
     requiere_cereal: bool = False,
     evita_cereal: bool = False,
     macro_requerido: str | None = None,
+    contexto: ContextoGeneracion | None = None,
 ) -> dict | None:
-    candidatos = []
-    for alimento in _alimentos_por_rol(rol):
-        if requiere_cereal and not _es_cereal_o_pan(alimento):
-            continue
-        if evita_cereal and _es_cereal_o_pan(alimento):
-            continue
-        if macro_requerido and alimento.get(f"{macro_requerido}_100g", 0) <= 0:
-            continue
-        candidatos.append(alimento)
+    def calcular() -> list[dict]:
+        candidatos = []
+        for alimento in _alimentos_por_rol(rol, contexto):
+            if requiere_cereal and not _es_cereal_o_pan(alimento):
+                continue
+            if evita_cereal and _es_cereal_o_pan(alimento):
+                continue
+            if macro_requerido and alimento.get(f"{macro_requerido}_100g", 0) <= 0:
+                continue
+            candidatos.append(alimento)
+        return candidatos
+
+    candidatos = _indice(contexto).derivado(
+        ("seleccion", rol.lower(), requiere_cereal, evita_cereal, macro_requerido),
+        calcular,
+    )
     if not candidatos:
         return None
-    disponibles = _despensa_disponible()
+    disponibles = contexto.disponibles if contexto else despensa_disponible()
     en_despensa = [item for item in candidatos if item.get("ean") in disponibles]
     if en_despensa:
-        return random.choice(en_despensa)
-    return random.choice(candidatos)
+        return _aleatorio(contexto).choice(en_despensa)
+    return _aleatorio(contexto).choice(candidatos)
 
 
 def _calcular_gramos(alimento: dict, gramos: float) -> dict:
@@ -152,13 +203,9 @@ def _gramos_para_kcal(alimento: dict, kcal_objetivo: float) -> float:
     return max((kcal_objetivo / kcal_100g) * 100, 1)
 
 
-def _seleccionar_postre(comida: str) -> dict | None:
-    candidatos = [
-        alimento
-        for alimento in list_alimentos()
-        if any(valor in _texto_grupo(alimento) for valor in POSTRE_VALIDO)
-    ]
-    return random.choice(candidatos) if candidatos else None
+def _seleccionar_postre(comida: str, contexto: ContextoGeneracion | None = None) -> dict | None:
+    candidatos = _indice(contexto).por_clasificacion(POSTRE)
+    return _aleatorio(contexto).choice(candidatos) if candidatos else None
 
 
 def _objetivos_por_comida(objetivo: dict) -> dict[str, dict]:
@@ -201,13 +248,18 @@ def _dentro_margen_macros(objetivo: dict, totals: dict) -> bool:
     )
 
 
-def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
+def _generar_items_comida(comida: str, objetivo: dict, contexto: ContextoGeneracion | None = None) -> list[dict]:
     items = []
     if comida in {"Desayuno", "Media mañana", "Merienda"}:
-        candidatos = _candidatos_desayuno_snack(comida)
+        candidatos = _candidatos_desayuno_snack(comida, contexto)
         if not candidatos:
             return items
-        proteina = _seleccionar_alimento("proteina", comida, macro_requerido="proteina")
+        proteina = _seleccionar_alimento(
+            "proteina",
+            comida,
+            macro_requerido="proteina",
+            contexto=contexto,
+        )
         if proteina and proteina in candidatos:
             grams = _gramos_para_macro(proteina, "proteina", objetivo["proteina"])
             if grams > 0:
@@ -222,7 +274,7 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                 )
                 candidatos = [item for item in candidatos if item.get("ean") != proteina.get("ean")]
         if candidatos:
-            extra = random.choice(candidatos)
+            extra = _aleatorio(contexto).choice(candidatos)
             gramos = _gramos_para_macro(extra, "hidratos", objetivo["hidratos"]) or _gramos_para_kcal(extra, 150)
             if gramos > 0:
                 macros = _calcular_gramos(extra, gramos)
@@ -236,7 +288,7 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                 )
                 candidatos = [item for item in candidatos if item.get("ean") != extra.get("ean")]
         if len(items) < 2 and candidatos:
-            extra = random.choice(candidatos)
+            extra = _aleatorio(contexto).choice(candidatos)
             gramos = _gramos_para_kcal(extra, 120)
             if gramos > 0:
                 macros = _calcular_gramos(extra, gramos)
@@ -249,7 +301,8 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                     }
                 )
         if len(items) < 2:
-            fallback = random.choice(list_alimentos()) if list_alimentos() else None
+            todos = _indice(contexto).todos
+            fallback = _aleatorio(contexto).choice(todos) if todos else None
             if fallback:
                 gramos = _gramos_para_kcal(fallback, 120)
                 if gramos > 0:
@@ -264,7 +317,7 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                     )
         return items
 
-    proteina = _seleccionar_alimento("proteina", comida, macro_requerido="proteina")
+    proteina = _seleccionar_alimento("proteina", comida, macro_requerido="proteina", contexto=contexto)
     if proteina:
         gramos = _gramos_para_macro(proteina, "proteina", objetivo["proteina"])
         if gramos > 0:
@@ -278,7 +331,13 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                 }
             )
 
-    hidrato = _seleccionar_alimento("hidrato", comida, evita_cereal=True, macro_requerido="hidratos")
+    hidrato = _seleccionar_alimento(
+        "hidrato",
+        comida,
+        evita_cereal=True,
+        macro_requerido="hidratos",
+        contexto=contexto,
+    )
     if hidrato:
         gramos = _gramos_para_macro(hidrato, "hidratos", objetivo["hidratos"])
         if gramos > 0:
@@ -292,11 +351,28 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                 }
             )
 
-    relleno = _seleccionar_alimento("grasa", comida, evita_cereal=True, macro_requerido="grasas")
+    relleno = _seleccionar_alimento(
+        "grasa",
+        comida,
+        evita_cereal=True,
+        macro_requerido="grasas",
+        contexto=contexto,
+    )
     if not relleno:
-        relleno = _seleccionar_alimento("hidrato", comida, evita_cereal=True, macro_requerido="hidratos")
+        relleno = _seleccionar_alimento(
+            "hidrato",
+            comida,
+            evita_cereal=True,
+            macro_requerido="hidratos",
+            contexto=contexto,
+        )
     if not relleno:
-        relleno = _seleccionar_alimento("proteina", comida, macro_requerido="proteina")
+        relleno = _seleccionar_alimento(
+            "proteina",
+            comida,
+            macro_requerido="proteina",
+            contexto=contexto,
+        )
     if relleno:
         gramos = (
             _gramos_para_macro(relleno, "grasas", objetivo["grasas"])
@@ -314,12 +390,9 @@ def _generar_items_comida(comida: str, objetivo: dict) -> list[dict]:
                 }
             )
     if len(items) < 3:
-        candidatos = [
-            alimento
-            for alimento in list_alimentos()
-        ]
+        candidatos = list(_indice(contexto).todos)
         while len(items) < 3 and candidatos:
-            extra = random.choice(candidatos)
+            extra = _aleatorio(contexto).choice(candidatos)
             candidatos = [item for item in candidatos if item.get("ean") != extra.get("ean")]
             gramos = _gramos_para_kcal(extra, 120)
             if gramos > 0:
@@ -367,15 +440,99 @@ def _ajustar_tolerancia(items: list[dict], objetivo: dict) -> list[dict]:
     return ajustados
 
 
-def generar_menu_dia(comidas: list[dict], tipo: str) -> dict[str, list[dict]]:
-    objetivo = objetivos_por_tipo(tipo)
+def _totales_menu(menu: dict[str, list[dict]]) -> dict:
+    return {
+        macro: sum(item[macro] for items in menu.values() for item in items)
+        for macro in ("kcal", "proteina", "hidratos", "grasas")
+    }
+
+
+def evaluar_menu(menu: dict[str, list[dict]], objetivo: dict) -> dict:
+    totales = _totales_menu(menu)
+    return {
+        "fuera_de_margen": bool(error_macros(objetivo, totales) > 1),
+        "desviacion": {macro: round(totales[macro] - objetivo[macro], 1) for macro in MACROS},
+    }
+
+
+def _repartir_items(menu: dict[str, list[dict]], items: list[dict]) -> dict[str, list[dict]]:
+    index = 0
+    menu_final = {}
+    for nombre in menu:
+        cantidad = len(menu[nombre])
+        menu_final[nombre] = items[index : index + cantidad]
+        index += cantidad
+    return menu_final
+
+
+def _generar_menu_resuelto(
+    comidas: list[dict],
+    objetivo: dict,
+    contexto: ContextoGeneracion | None = None,
+) -> dict[str, list[dict]]:
+    objetivos_comidas = _objetivos_por_comida(objetivo)
+    mejor: dict[str, list[dict]] = {}
+    mejor_error = float("inf")
+    for _ in range(INTENTOS_SOLVER):
+        menu = {
+            comida["nombre"]: _generar_items_comida(
+                comida["nombre"], objetivos_comidas[comida["nombre"]], contexto
+            )
+            for comida in comidas
+            if comida["nombre"] in objetivos_comidas
+        }
+        items = [item for items in menu.values() for item in items]
+        menu = _repartir_items(menu, resolver_porciones(items, objetivo))
+        error = error_macros(objetivo, _totales_menu(menu))
+        if error < mejor_error:
+            mejor, mejor_error = menu, error
+        if error <= 1:
+            break
+    return mejor
+
+
+def generar_menu_dia(
+    comidas: list[dict],
+    tipo: str,
+    modo: str = "solver",
+    contexto: ContextoGeneracion | None = None,
+) -> dict[str, list[dict]]:
+    contexto = contexto or crear_contexto()
+    objetivo = contexto.objetivo(tipo)
+    if contexto.semilla is None:
+        return _generar_menu(comidas, objetivo, modo, contexto)
+    semilla = contexto.aleatorio.getrandbits(64)
+    clave = (
+        tipo,
+        tuple(sorted(objetivo.items())),
+        tuple(comida["nombre"] for comida in comidas),
+        contexto.version_catalogo,
+        contexto.version_despensa,
+        modo,
+        semilla,
+    )
+    menu = memo_menus.obtener(clave)
+    if menu is None:
+        menu = _generar_menu(comidas, objetivo, modo, replace(contexto, aleatorio=random.Random(semilla)))
+        memo_menus.guardar(clave, menu)
+    return menu
+
+
+def _generar_menu(
+    comidas: list[dict],
+    objetivo: dict,
+    modo: str,
+    contexto: ContextoGeneracion,
+) -> dict[str, list[dict]]:
+    if modo == "solver":
+        return _generar_menu_resuelto(comidas, objetivo, contexto)
     objetivos_comidas = _objetivos_por_comida(objetivo)
     menu: dict[str, list[dict]] = {}
     for comida in comidas:
         nombre = comida["nombre"]
         if nombre not in objetivos_comidas:
             continue
-        menu[nombre] = _generar_items_comida(nombre, objetivos_comidas[nombre])
+        menu[nombre] = _generar_items_comida(nombre, objetivos_comidas[nombre], contexto)
     def ajustar_menu(menu_actual: dict[str, list[dict]]) -> dict[str, list[dict]]:
         items_totales = [item for items in menu_actual.values() for item in items]
         items_ajustados = _ajustar_tolerancia(items_totales, objetivo)
@@ -410,7 +567,7 @@ def generar_menu_dia(comidas: list[dict], tipo: str) -> dict[str, list[dict]]:
             nombre = comida["nombre"]
             if nombre not in objetivos_comidas:
                 continue
-            menu[nombre] = _generar_items_comida(nombre, objetivos_comidas[nombre])
+            menu[nombre] = _generar_items_comida(nombre, objetivos_comidas[nombre], contexto)
         menu = ajustar_menu(menu)
     return menu
 
@@ -424,15 +581,18 @@ def generar_comida(comida: str, macros_objetivo: dict) -> list[dict]:
     return _generar_items_comida(comida, objetivo)
 
 
-def registrar_faltantes(items: list[dict]) -> None:
-    disponibles = _despensa_disponible()
+def registrar_faltantes(items: Iterable[dict], contexto: ContextoGeneracion | None = None) -> int:
+    disponibles = contexto.disponibles if contexto else despensa_disponible()
+    faltantes: dict[str, dict] = {}
     for item in items:
         nombre = item.get("nombre") or ""
-        ean = item.get("ean")
-        if ean and ean not in disponibles:
-            add_lista_compra(ean, nombre)
-        elif not ean and nombre:
-            add_lista_compra(None, nombre)
+        ean = item.get("ean") or None
+        if (ean and ean in disponibles) or (not ean and not nombre):
+            continue
+        clave = clave_lista_compra(ean, nombre)
+        faltante = faltantes.setdefault(clave, {"ean": ean, "nombre": nombre, "gramos": 0.0})
+        faltante["gramos"] += float(item.get("gramos") or 0)
+    return upsert_lista_compra(faltantes.values())
 
 
 def sustituir_item(item: dict) -> dict | None:
@@ -443,7 +603,7 @@ def sustituir_item(item: dict) -> dict | None:
     ]
     if not candidatos:
         return None
-    nuevo = random.choice(candidatos)
+    nuevo = _aleatorio_global.choice(candidatos)
     gramos = item["gramos"]
     factor = gramos / 100
     detalle = {
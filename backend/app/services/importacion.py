@@ -0,0 +1,167 @@
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterator
+
+from pydantic import ValidationError
+
+from .. import db
+from ..crud import add_alimentos
+from ..schemas import AlimentoCreate
+
+
+TAMANO_LOTE = 500
+
+COLUMNAS_LEGACY = {
+    "grupo_funcional": "grupo_mediterraneo",
+    "subgrupo_funcional": "categorias",
+}
+
+
+def _formato_declarado(content_type: str) -> str | None:
+    content_type = content_type.lower()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if "json" in content_type:
+        return "json"
+    if "csv" in content_type:
+        return "csv"
+    return None
+
+
+def _formato(cuerpo: str, content_type: str) -> str:
+    declarado = _formato_declarado(content_type)
+    if declarado:
+        return declarado
+    inicio = cuerpo.lstrip()[:1]
+    if inicio == "[":
+        return "json"
+    if inicio == "{":
+        return "ndjson"
+    return "csv"
+
+
+def _normalizar_fila_csv(fila: dict) -> dict:
+    normalizada = {clave.strip(): valor for clave, valor in fila.items() if clave and clave.strip()}
+    for columna, legacy in COLUMNAS_LEGACY.items():
+        if columna not in normalizada and legacy in normalizada:
+            normalizada[columna] = normalizada[legacy] or ""
+    for columna in ("ean", "marca"):
+        if not normalizada.get(columna):
+            normalizada[columna] = None
+    return normalizada
+
+
+def _filas_json(texto: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    try:
+        filas = json.loads(texto)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"JSON no válido: {exc}") from exc
+    if not isinstance(filas, list):
+        raise ValueError("Se esperaba un array JSON de alimentos")
+    for numero, fila in enumerate(filas, start=1):
+        yield numero, fila, None
+
+
+def _errores_validacion(exc: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(parte) for parte in error['loc']) or 'fila'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def _validar(numero: int, fila, error: str | None, errores: list[dict]) -> dict | None:
+    if error:
+        errores.append({"fila": numero, "errores": [error]})
+        return None
+    if not isinstance(fila, dict):
+        errores.append({"fila": numero, "errores": ["Se esperaba un objeto"]})
+        return None
+    try:
+        return AlimentoCreate.model_validate(fila).model_dump()
+    except ValidationError as exc:
+        errores.append({"fila": numero, "errores": _errores_validacion(exc)})
+        return None
+
+
+def _corte(texto: str, formato: str) -> int:
+    corte = texto.rfind("\n")
+    if formato != "csv":
+        return corte
+    comillas = texto.count('"')
+    while corte >= 0 and (comillas - texto.count('"', corte)) % 2:
+        corte = texto.rfind("\n", 0, corte)
+    return corte
+
+
+def _filas_bloque(
+    bloque: str, formato: str, cabecera: list[str] | None, delimitador: str
+) -> tuple[list[tuple[dict | None, str | None]], list[str] | None]:
+    if formato == "csv":
+        lector = csv.DictReader(io.StringIO(bloque), fieldnames=cabecera, delimiter=delimitador)
+        filas = [(_normalizar_fila_csv(fila), None) for fila in lector]
+        return filas, lector.fieldnames
+    filas = []
+    for linea in bloque.splitlines():
+        if not linea.strip():
+            continue
+        try:
+            filas.append((json.loads(linea), None))
+        except json.JSONDecodeError as exc:
+            filas.append((None, f"JSON no válido: {exc.msg}"))
+    return filas, cabecera
+
+
+async def leer_filas_stream(
+    trozos: AsyncIterator[bytes], content_type: str, delimitador: str = ","
+) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    formato = _formato_declarado(content_type)
+    texto = ""
+    cabecera = None
+    numero = 0
+    async for trozo in trozos:
+        texto += decodificador.decode(trozo)
+        if formato is None and texto.strip():
+            formato = _formato(texto, content_type)
+        if formato in (None, "json"):
+            continue
+        corte = _corte(texto, formato)
+        if corte < 0:
+            continue
+        bloque, texto = texto[: corte + 1], texto[corte + 1 :]
+        filas, cabecera = _filas_bloque(bloque, formato, cabecera, delimitador)
+        for fila, error in filas:
+            numero += 1
+            yield numero, fila, error
+    texto += decodificador.decode(b"", final=True)
+    formato = formato or _formato(texto, content_type)
+    if formato == "json":
+        for fila in _filas_json(texto):
+            yield fila
+        return
+    filas, cabecera = _filas_bloque(texto, formato, cabecera, delimitador)
+    for fila, error in filas:
+        numero += 1
+        yield numero, fila, error
+
+
+async def importar_alimentos(
+    trozos: AsyncIterator[bytes], content_type: str, delimitador: str = ","
+) -> dict:
+    recibidas = 0
+    insertadas = 0
+    errores: list[dict] = []
+    lote: list[dict] = []
+    async for numero, fila, error in leer_filas_stream(trozos, content_type, delimitador):
+        recibidas += 1
+        alimento = _validar(numero, fila, error, errores)
+        if alimento is None:
+            continue
+        lote.append(alimento)
+        if len(lote) >= TAMANO_LOTE:
+            insertadas += await db.escribir(add_alimentos, lote)
+            lote = []
+    insertadas += await db.escribir(add_alimentos, lote)
+    return {"recibidas": recibidas, "insertadas": insertadas, "errores": errores}
@@ -1,5 +1,107 @@
-from ..crud import record_aprendizaje
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from .. import db
+from ..crud import record_aprendizajes
+
+
+CAPACIDAD = int(os.environ.get("BEFITLAB_EVENTOS_CAPACIDAD", "10000"))
+TAMANO_LOTE = int(os.environ.get("BEFITLAB_EVENTOS_LOTE", "200"))
+INTERVALO = float(os.environ.get("BEFITLAB_EVENTOS_INTERVALO", "1.0"))
+POLITICA = os.environ.get("BEFITLAB_EVENTOS_POLITICA", "descartar")
+ESPERA_BLOQUEO = 0.5
+
+_FIN = object()
+
+
+class RegistroEventos:
+    def __init__(
+        self,
+        capacidad: int = CAPACIDAD,
+        tamano_lote: int = TAMANO_LOTE,
+        intervalo: float = INTERVALO,
+        politica: str = POLITICA,
+    ) -> None:
+        if politica not in {"descartar", "bloquear"}:
+            raise ValueError(f"Política de eventos desconocida: {politica}")
+        self.tamano_lote = max(tamano_lote, 1)
+        self.intervalo = intervalo
+        self.politica = politica
+        self.escritos = 0
+        self.descartados = 0
+        self.fallidos = 0
+        self._cola: queue.Queue = queue.Queue(maxsize=max(capacidad, 1))
+        self._hilo: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._ciclo_lock = threading.Lock()
+
+    def registrar(self, evento: str, detalle: str) -> None:
+        self._arrancar()
+        fila = (evento, detalle, datetime.utcnow().isoformat())
+        try:
+            if self.politica == "bloquear":
+                self._cola.put(fila, timeout=ESPERA_BLOQUEO)
+            else:
+                self._cola.put_nowait(fila)
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+
+    def cerrar(self) -> None:
+        with self._ciclo_lock:
+            if self._hilo is not None:
+                self._cola.put(_FIN)
+                self._hilo.join()
+                self._hilo = None
+
+    def _arrancar(self) -> None:
+        if self._hilo is not None:
+            return
+        with self._ciclo_lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="befitlab-eventos", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        lote: list[tuple[str, str, str]] = []
+        limite = time.monotonic() + self.intervalo
+        while True:
+            try:
+                fila = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+            except queue.Empty:
+                fila = None
+            if fila is _FIN:
+                self._volcar(lote)
+                return
+            if fila is not None:
+                lote.append(fila)
+            if len(lote) >= self.tamano_lote or time.monotonic() >= limite:
+                self._volcar(lote)
+                lote = []
+                limite = time.monotonic() + self.intervalo
+
+    def _volcar(self, lote: list[tuple[str, str, str]]) -> None:
+        if not lote:
+            return
+        try:
+            escritos = db.enviar_escritura(record_aprendizajes, lote).result()
+        except Exception:
+            with self._lock:
+                self.fallidos += len(lote)
+            return
+        with self._lock:
+            self.escritos += escritos
+
+
+registro_eventos = RegistroEventos()
 
 
 def registrar_evento(evento: str, detalle: str) -> None:
-    record_aprendizaje(evento, detalle)
+    registro_eventos.registrar(evento, detalle)
+
+
+def cerrar_registro() -> None:
+    registro_eventos.cerrar()
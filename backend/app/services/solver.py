@@ -0,0 +1,132 @@
+import numpy as np
+
+
+MACROS = ("kcal", "proteina", "hidratos", "grasas")
+
+MARGEN_KCAL = 100
+MARGEN_RELATIVO = 0.05
+
+LIMITES_POR_ROL = {
+    "proteina": (10.0, 300.0),
+    "hidrato": (10.0, 350.0),
+    "grasa": (3.0, 80.0),
+}
+LIMITES_POR_DEFECTO = (5.0, 300.0)
+
+PESO_REGULARIZACION = 1e-3
+MAX_ITERACIONES = 100
+REPONDERACIONES = 4
+
+
+def _tolerancias(objetivo: dict) -> np.ndarray:
+    return np.array(
+        [MARGEN_KCAL]
+        + [max(objetivo[macro] * MARGEN_RELATIVO, 1.0) for macro in MACROS[1:]],
+        dtype=float,
+    )
+
+
+def limites_item(item: dict) -> tuple[float, float]:
+    rol = str(item.get("rol_principal", "")).lower()
+    for clave, limites in LIMITES_POR_ROL.items():
+        if clave in rol:
+            return limites
+    return LIMITES_POR_DEFECTO
+
+
+def error_macros(objetivo: dict, totals: dict) -> float:
+    tolerancias = _tolerancias(objetivo)
+    return max(
+        abs(totals[macro] - objetivo[macro]) / tolerancia
+        for macro, tolerancia in zip(MACROS, tolerancias)
+    )
+
+
+def _qp_acotado(
+    q: np.ndarray,
+    c: np.ndarray,
+    inferior: np.ndarray,
+    superior: np.ndarray,
+    x: np.ndarray,
+) -> np.ndarray:
+    # Conjunto activo primal para min 1/2 x'Qx - c'x con inferior <= x <= superior.
+    libres = (x > inferior) & (x < superior)
+    for _ in range(MAX_ITERACIONES):
+        if libres.any():
+            fijas = ~libres
+            objetivo = x.copy()
+            objetivo[libres] = np.linalg.solve(
+                q[np.ix_(libres, libres)],
+                c[libres] - q[np.ix_(libres, fijas)] @ x[fijas],
+            )
+            direccion = objetivo - x
+            paso = 1.0
+            bloqueo = -1
+            for i in np.flatnonzero(libres):
+                if direccion[i] < 0 and x[i] + direccion[i] < inferior[i]:
+                    limite = (inferior[i] - x[i]) / direccion[i]
+                elif direccion[i] > 0 and x[i] + direccion[i] > superior[i]:
+                    limite = (superior[i] - x[i]) / direccion[i]
+                else:
+                    continue
+                if limite < paso:
+                    paso, bloqueo = limite, i
+            x = np.clip(x + paso * direccion, inferior, superior)
+            if bloqueo >= 0:
+                libres[bloqueo] = False
+                continue
+        gradiente = q @ x - c
+        violaciones = np.where(
+            ~libres & (((x <= inferior) & (gradiente < 0)) | ((x >= superior) & (gradiente > 0))),
+            np.abs(gradiente),
+            0.0,
+        )
+        if not violaciones.any():
+            break
+        libres[int(np.argmax(violaciones))] = True
+    return x
+
+
+def resolver_porciones(items: list[dict], objetivo: dict) -> list[dict]:
+    activos = [indice for indice, item in enumerate(items) if item["gramos"] > 0]
+    if not activos:
+        return items
+    por_100g = np.array(
+        [[items[indice][macro] / items[indice]["gramos"] * 100 for indice in activos] for macro in MACROS],
+        dtype=float,
+    )
+    tolerancias = _tolerancias(objetivo)
+    a = por_100g / tolerancias[:, None]
+    b = np.array([objetivo[macro] for macro in MACROS], dtype=float) / tolerancias
+    x0 = np.array([items[indice]["gramos"] / 100 for indice in activos], dtype=float)
+    limites = np.array([limites_item(items[indice]) for indice in activos], dtype=float) / 100
+    inferior = limites[:, 0]
+    superior = limites[:, 1]
+    regularizacion = PESO_REGULARIZACION / np.square(x0)
+
+    pesos = np.ones(len(MACROS))
+    x = np.clip(x0, inferior, superior)
+    for _ in range(REPONDERACIONES + 1):
+        aw = a * pesos[:, None]
+        q = aw.T @ aw + np.diag(regularizacion)
+        c = aw.T @ (b * pesos) + regularizacion * x0
+        x = _qp_acotado(q, c, inferior, superior, x)
+        residuos = np.abs(a @ x - b)
+        if residuos.max() <= 1:
+            break
+        pesos = pesos * np.maximum(residuos, 1.0)
+
+    resueltos = list(items)
+    for posicion, indice in enumerate(activos):
+        item = items[indice]
+        gramos = float(x[posicion] * 100)
+        factor = gramos / item["gramos"]
+        resueltos[indice] = {
+            **item,
+            "gramos": gramos,
+            "kcal": item["kcal"] * factor,
+            "proteina": item["proteina"] * factor,
+            "hidratos": item["hidratos"] * factor,
+            "grasas": item["grasas"] * factor,
+        }
+    return resueltos
@@ -1,23 +1,15 @@
-from ..crud import list_comidas, list_comida_items, get_objetivo
+from datetime import date, timedelta
+from typing import Iterable
 
+from ..crud import list_comidas, list_items_por_dias, resumen_macros_comidas, resumen_macros_dias
 
-def resumen_dia(dia: dict) -> dict:
-    comidas = list_comidas(dia["id"])
-    totals = {"kcal": 0, "proteina": 0, "hidratos": 0, "grasas": 0}
-    for comida in comidas:
-        items = list_comida_items(comida["id"])
-        for item in items:
-            totals["kcal"] += item["kcal"]
-            totals["proteina"] += item["proteina"]
-            totals["hidratos"] += item["hidratos"]
-            totals["grasas"] += item["grasas"]
-    objetivo_raw = get_objetivo(dia["tipo"])
-    objetivo = {
-        "kcal": objetivo_raw["kcal"],
-        "proteina": objetivo_raw["proteina"],
-        "hidratos": objetivo_raw["hidratos"],
-        "grasas": objetivo_raw["grasas"],
-    }
+
+MACROS = ("kcal", "proteina", "hidratos", "grasas")
+
+
+def _construir_resumen(fila: dict) -> dict:
+    objetivo = {key: fila[f"objetivo_{key}"] for key in MACROS}
+    totals = {key: fila[key] for key in MACROS}
     return {
         "objetivo": objetivo,
         "consumo": totals,
@@ -26,3 +18,68 @@ def resumen_dia(dia: dict) -> dict:
             for key in objetivo
         },
     }
+
+
+def resumen_dias(dia_ids: Iterable[str]) -> dict[str, dict]:
+    return {str(fila["dia_id"]): _construir_resumen(fila) for fila in resumen_macros_dias(dia_ids)}
+
+
+def resumen_dia(dia: dict) -> dict:
+    dia_id = str(dia["id"])
+    return resumen_dias([dia_id])[dia_id]
+
+
+def dia_completo(dia_id: str) -> dict | None:
+    filas = resumen_macros_dias([dia_id])
+    if not filas:
+        return None
+    fila = filas[0]
+    comidas = [{**comida, "items": []} for comida in list_comidas(dia_id)]
+    por_id = {comida["id"]: comida for comida in comidas}
+    for item in list_items_por_dias([dia_id]):
+        comida = por_id.get(item["comida_id"])
+        if comida is not None:
+            comida["items"].append(item)
+    return {
+        "dia": {"id": fila["dia_id"], "fecha": fila["fecha"], "tipo": fila["tipo"]},
+        "comidas": comidas,
+        "resumen": _construir_resumen(fila),
+    }
+
+
+def resumen_semana(desde: date, dias: int = 7) -> dict:
+    hasta = desde + timedelta(days=max(dias, 1) - 1)
+    por_dia: dict = {}
+    por_comida: dict = {}
+    for fila in resumen_macros_comidas(desde, hasta):
+        dia = por_dia.get(fila["dia_id"])
+        if dia is None:
+            dia = {
+                "id": fila["dia_id"],
+                "fecha": fila["fecha"],
+                "fecha_iso": fila["fecha_iso"],
+                "tipo": fila["tipo"],
+                "objetivo": {key: fila[f"objetivo_{key}"] for key in MACROS},
+                "totales": {key: 0 for key in MACROS},
+                "comidas": [],
+            }
+            por_dia[fila["dia_id"]] = dia
+        if fila["comida_id"] is None:
+            continue
+        comida = {
+            "id": fila["comida_id"],
+            "nombre": fila["comida_nombre"],
+            "totales": {key: fila[key] for key in MACROS},
+            "items": [],
+        }
+        dia["comidas"].append(comida)
+        por_comida[fila["comida_id"]] = comida
+        for key in MACROS:
+            dia["totales"][key] += fila[key]
+    for item in list_items_por_dias(list(por_dia)):
+        comida = por_comida.get(item["comida_id"])
+        if comida is not None:
+            comida["items"].append(item)
+    for dia in por_dia.values():
+        dia["diferencia"] = {key: dia["totales"][key] - dia["objetivo"][key] for key in MACROS}
+    return {"desde": desde.isoformat(), "hasta": hasta.isoformat(), "dias": list(por_dia.values())}
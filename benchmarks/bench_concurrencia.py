@@ -0,0 +1,140 @@
+"""Carga concurrente mixta (lecturas y escrituras) contra la API servida por uvicorn.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_concurrencia.py [--clientes 16] [--segundos 10] [--escrituras 0.2]
+
+Arranca uvicorn en un hilo sobre una copia temporal de backend/befitlab.db,
+lanza N clientes HTTP con keep-alive y mide peticiones por segundo, latencias
+y errores por código de estado.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cliente(base: str, dias: list, items: list, proporcion: float, fin: float, semilla: int, resultados: list) -> None:
+    import requests
+
+    aleatorio = random.Random(semilla)
+    session = requests.Session()
+    latencias = []
+    estados = Counter()
+    while time.perf_counter() < fin:
+        if aleatorio.random() < proporcion:
+            if aleatorio.random() < 0.5:
+                peticion = ("POST", "/consumo", {"comida_item_id": aleatorio.choice(items), "estado": "aceptado", "gramos": 100})
+            else:
+                nombre = f"bench-{aleatorio.randrange(50)}"
+                peticion = ("POST", "/despensa", {"ean": nombre, "nombre": nombre, "estado": "disponible"})
+        else:
+            peticion = aleatorio.choice(
+                [
+                    ("GET", "/dias", None),
+                    ("GET", "/dashboard/semana", None),
+                    ("GET", f"/dias/{aleatorio.choice(dias)}/completo", None),
+                    ("GET", "/despensa", None),
+                ]
+            )
+        metodo, ruta, cuerpo = peticion
+        inicio = time.perf_counter()
+        try:
+            estado = session.request(metodo, f"{base}{ruta}", json=cuerpo, timeout=30).status_code
+        except Exception:
+            estado = "excepcion"
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        estados[estado] += 1
+    resultados.append((latencias, estados))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--escrituras", type=float, default=0.2, help="proporción de peticiones de escritura")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-bench-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+
+    import requests
+    import uvicorn
+
+    from backend.app.main import app
+
+    puerto = _puerto_libre()
+    base = f"http://127.0.0.1:{puerto}"
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="error"))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    try:
+        while not servidor.started:
+            time.sleep(0.05)
+        dias = []
+        for offset in range(7):
+            dia_id = requests.post(f"{base}/dias", json={"fecha": f"{offset + 1:02d}/01/2030", "tipo": "Entreno"}).json()["id"]
+            requests.post(f"{base}/generador", json={"dia_id": dia_id}).raise_for_status()
+            dias.append(dia_id)
+        items = [
+            item["id"]
+            for dia_id in dias
+            for comida in requests.get(f"{base}/dias/{dia_id}/completo").json()["comidas"]
+            for item in comida["items"]
+        ]
+
+        resultados: list = []
+        fin = time.perf_counter() + args.segundos
+        clientes = [
+            threading.Thread(
+                target=_cliente,
+                args=(base, dias, items, args.escrituras, fin, semilla, resultados),
+            )
+            for semilla in range(args.clientes)
+        ]
+        inicio = time.perf_counter()
+        for cliente in clientes:
+            cliente.start()
+        for cliente in clientes:
+            cliente.join()
+        duracion = time.perf_counter() - inicio
+    finally:
+        servidor.should_exit = True
+        hilo.join()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    latencias = sorted(latencia for parcial, _ in resultados for latencia in parcial)
+    estados = sum((parcial for _, parcial in resultados), Counter())
+    total = len(latencias)
+    print(f"clientes={args.clientes} segundos={duracion:.1f} escrituras={args.escrituras:.0%}")
+    print(f"peticiones={total} rps={total / duracion:.1f}")
+    print(
+        f"p50={statistics.median(latencias):.1f}ms "
+        f"p95={latencias[int(total * 0.95) - 1]:.1f}ms "
+        f"p99={latencias[int(total * 0.99) - 1]:.1f}ms"
+    )
+    print("estados=" + " ".join(f"{estado}:{cantidad}" for estado, cantidad in sorted(estados.items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
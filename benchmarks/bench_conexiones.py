@@ -0,0 +1,99 @@
+"""Cuenta conexiones SQLite y sentencias DDL que cuesta una llamada a /generador.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_conexiones.py [--repeticiones 5]
+
+Trabaja sobre una copia temporal de backend/befitlab.db, nunca sobre la original.
+Las sentencias se cuentan con la misma traza que usa el middleware de métricas
+para X-Query-Count, así que executemany cuenta una vez y no una por fila.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+DDL_PREFIJOS = ("CREATE", "ALTER", "DROP", "PRAGMA TABLE_INFO")
+
+
+class Contador:
+    def __init__(self) -> None:
+        self.conexiones = 0
+        self.ddl = 0
+        self.sentencias = 0
+
+    def traza(self, sentencia: str) -> None:
+        self.sentencias += 1
+        if sentencia.lstrip().upper().startswith(DDL_PREFIJOS):
+            self.ddl += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-bench-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+
+    from fastapi.testclient import TestClient
+
+    from backend.app import db
+    from backend.app.main import app
+
+    db.DB_PATH = db_path
+    contador = Contador()
+    connect_original = sqlite3.connect
+    trazar_original = db._trazar_consulta
+
+    def connect_contado(*c_args, **c_kwargs):
+        contador.conexiones += 1
+        return connect_original(*c_args, **c_kwargs)
+
+    def trazar_contado(sentencia: str) -> None:
+        if not sentencia.startswith("--"):
+            contador.traza(sentencia)
+        trazar_original(sentencia)
+
+    sqlite3.connect = connect_contado
+    db._trazar_consulta = trazar_contado
+    try:
+        with TestClient(app) as client:
+            dia_id = client.post("/dias", json={"fecha": "01/01/2030", "tipo": "Entreno"}).json()["id"]
+            resultados = []
+            for _ in range(args.repeticiones):
+                antes = (contador.conexiones, contador.ddl, contador.sentencias)
+                inicio = time.perf_counter()
+                response = client.post("/generador", json={"dia_id": dia_id})
+                duracion = time.perf_counter() - inicio
+                response.raise_for_status()
+                resultados.append(
+                    (
+                        contador.conexiones - antes[0],
+                        contador.ddl - antes[1],
+                        contador.sentencias - antes[2],
+                        duracion * 1000,
+                    )
+                )
+    finally:
+        sqlite3.connect = connect_original
+        db._trazar_consulta = trazar_original
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{'llamada':>8} {'conexiones':>11} {'ddl':>6} {'sentencias':>11} {'ms':>9}")
+    for indice, (conexiones, ddl, sentencias, ms) in enumerate(resultados, start=1):
+        print(f"{indice:>8} {conexiones:>11} {ddl:>6} {sentencias:>11} {ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Comprueba que generar un menú cuesta un número constante de consultas SQL.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_consultas.py [--dias 7]
+
+Rellena la despensa de una copia temporal de backend/befitlab.db con 0, 100 y
+1000 alimentos disponibles y cuenta las sentencias que ejecutan
+crear_contexto() y generar_menu_dia() en ambos modos. Termina con código 1 si
+el número de consultas depende del tamaño de la despensa o de los días
+generados.
+
+También comprueba que un bucle N+1 real (list_comida_items para varios ids)
+aparece como una única sentencia repetida en db.consultas_repetidas, que es lo
+que publica la cabecera X-Query-Max-Repeticiones.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dias", type=int, default=7)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-bench-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+
+    from backend.app import crud, db
+    from backend.app.services.generator import MEAL_ORDER, crear_contexto, generar_menu_dia
+
+    comidas = [{"nombre": nombre} for nombre in MEAL_ORDER]
+    eans = [alimento["ean"] for alimento in crud.list_alimentos() if alimento["ean"]]
+    filas = []
+    try:
+        generar_menu_dia(comidas, "Entreno")
+        for tamano in (0, 100, 1000):
+            with db.get_connection() as connection:
+                connection.execute("DELETE FROM despensa")
+                connection.executemany(
+                    "INSERT INTO despensa (ean, nombre, estado) VALUES (?, ?, 'disponible')",
+                    [(ean, ean) for ean in eans[:tamano]],
+                )
+            for modo in ("solver", "ajuste"):
+                with db.contar_consultas() as contexto_sql:
+                    contexto = crear_contexto()
+                with db.contar_consultas() as un_dia:
+                    generar_menu_dia(comidas, "Entreno", modo, contexto)
+                with db.contar_consultas() as varios_dias:
+                    for _ in range(args.dias):
+                        generar_menu_dia(comidas, "Entreno", modo, contexto)
+                filas.append((tamano, modo, len(contexto_sql), len(un_dia), len(varios_dias)))
+        with db.contar_consultas() as n_mas_uno:
+            for comida_id in (1, 2, 3):
+                crud.list_comida_items(comida_id)
+        repeticiones = max(db.consultas_repetidas(n_mas_uno).values(), default=0)
+    finally:
+        db.cerrar_conexiones()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{'despensa':>9} {'modo':>7} {'contexto':>9} {'1 día':>6} {f'{args.dias} días':>8}")
+    for tamano, modo, contexto, un_dia, varios in filas:
+        print(f"{tamano:>9} {modo:>7} {contexto:>9} {un_dia:>6} {varios:>8}")
+    print(f"\nN+1 con 3 ids: la sentencia más repetida aparece {repeticiones} veces")
+    if repeticiones < 3:
+        print("consultas_repetidas no detecta el N+1.")
+        sys.exit(1)
+    constantes = len({(contexto, un_dia, varios) for _, _, contexto, un_dia, varios in filas}) == 1
+    if not constantes or any(un_dia != varios for _, _, _, un_dia, varios in filas):
+        print("El número de consultas no es constante.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compara los perfiles de almacenamiento con lectores y escritores en procesos distintos.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_perfiles.py [--lectores 4] [--escritores 2] [--segundos 5]
+
+Simula la API, la interfaz de Streamlit y los scripts de importación abriendo
+el mismo fichero a la vez. Cada perfil trabaja sobre su propia copia temporal de
+backend/befitlab.db. "sin_perfil" reproduce la configuración anterior: diario
+de rollback y los valores por defecto de sqlite3. Por cada perfil muestra
+lecturas y escrituras por segundo, la peor latencia p99 por tipo de operación y
+los errores de bloqueo.
+"""
+
+import argparse
+import multiprocessing
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+LECTURA = """
+    SELECT d.id, COUNT(ci.id), SUM(ci.kcal)
+    FROM dias d
+    JOIN comidas c ON c.dia_id = d.id
+    JOIN comida_items ci ON ci.comida_id = c.id
+    GROUP BY d.id
+"""
+FILAS_ESCRITURA = 50
+
+
+def _conectar(db_path: Path, perfil: str) -> sqlite3.Connection:
+    from backend.app import db
+
+    connection = sqlite3.connect(db_path)
+    if perfil != "sin_perfil":
+        db.aplicar_perfil(connection, perfil)
+    return connection
+
+
+def _trabajador(db_path: Path, perfil: str, escritor: bool, inicio: float, fin: float, resultados) -> None:
+    connection = _conectar(db_path, perfil)
+    latencias = []
+    bloqueos = 0
+    time.sleep(max(inicio - time.time(), 0))
+    try:
+        while time.time() < fin:
+            comienzo = time.perf_counter()
+            try:
+                if escritor:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO aprendizaje (evento, detalle, creado_en) VALUES (?, ?, datetime('now'))",
+                            [("bench_perfiles", f"fila={indice}") for indice in range(FILAS_ESCRITURA)],
+                        )
+                else:
+                    connection.execute(LECTURA).fetchall()
+                latencias.append((time.perf_counter() - comienzo) * 1000)
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc) and "busy" not in str(exc):
+                    raise
+                bloqueos += 1
+    finally:
+        connection.close()
+        latencias.sort()
+        p99 = latencias[max(int(len(latencias) * 0.99) - 1, 0)] if latencias else 0.0
+        resultados.put(("escritor" if escritor else "lector", len(latencias), p99, bloqueos))
+
+
+def medir(perfil: str, lectores: int, escritores: int, segundos: float) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-perfil-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    try:
+        _conectar(db_path, perfil).close()
+        resultados = multiprocessing.Queue()
+        inicio = time.time() + 1
+        fin = inicio + segundos
+        procesos = [
+            multiprocessing.Process(target=_trabajador, args=(db_path, perfil, escritor, inicio, fin, resultados))
+            for escritor in [False] * lectores + [True] * escritores
+        ]
+        for proceso in procesos:
+            proceso.start()
+        parciales = [resultados.get() for _ in procesos]
+        for proceso in procesos:
+            proceso.join()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    fila = {"perfil": perfil, "bloqueos": sum(bloqueos for *_, bloqueos in parciales)}
+    for tipo in ("lector", "escritor"):
+        propios = [parcial for parcial in parciales if parcial[0] == tipo]
+        fila[f"{tipo}_s"] = sum(operaciones for _, operaciones, _, _ in propios) / segundos
+        fila[f"{tipo}_p99_ms"] = max((p99 for _, _, p99, _ in propios), default=0.0)
+    return fila
+
+
+def main() -> None:
+    from backend.app import db
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lectores", type=int, default=4)
+    parser.add_argument("--escritores", type=int, default=2)
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--perfiles", nargs="+", default=["sin_perfil", *db.PERFILES])
+    args = parser.parse_args()
+
+    print(f"lectores={args.lectores} escritores={args.escritores} segundos={args.segundos}")
+    print(
+        f"{'perfil':>12} {'lecturas/s':>11} {'p99 lect.':>10} {'escrituras/s':>13} {'p99 escr.':>10} {'bloqueos':>9}"
+    )
+    for perfil in args.perfiles:
+        fila = medir(perfil, args.lectores, args.escritores, args.segundos)
+        print(
+            f"{fila['perfil']:>12} {fila['lector_s']:>11.1f} {fila['lector_p99_ms']:>8.1f}ms "
+            f"{fila['escritor_s']:>13.1f} {fila['escritor_p99_ms']:>8.1f}ms {fila['bloqueos']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Comprueba con EXPLAIN QUERY PLAN que las consultas calientes usan sus índices.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_planes.py
+
+Migra una copia temporal de backend/befitlab.db y muestra el plan de cada
+consulta. Termina con código 1 si alguna recorre entera una tabla que debería
+consultar por índice.
+
+Las consultas por rango de fechas se capturan ejecutando las funciones reales
+de crud con db.contar_consultas(), así que el plan comprobado es siempre el del
+SQL que se despliega. En ellas no se admite ningún SCAN de una tabla ni ningún
+índice AUTOMATIC.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+CONSULTAS = {
+    "comidas de un día": (
+        "SELECT * FROM comidas WHERE dia_id = ? ORDER BY id",
+        ("01/01/2030",),
+        {"comidas": "idx_comidas_dia"},
+    ),
+    "items de una comida": (
+        "SELECT * FROM comida_items WHERE comida_id = ? ORDER BY id",
+        (1,),
+        {"comida_items": "idx_comida_items_comida"},
+    ),
+    "consumo de un día": (
+        """
+        SELECT consumo.*, comida_items.comida_id
+        FROM consumo
+        JOIN comida_items ON comida_items.id = consumo.comida_item_id
+        JOIN comidas ON comidas.id = comida_items.comida_id
+        WHERE comidas.dia_id = ?
+        """,
+        ("01/01/2030",),
+        {"comidas": "idx_comidas_dia", "consumo": "idx_consumo_item"},
+    ),
+    "último consumo de un item": (
+        "SELECT MAX(id) FROM consumo WHERE comida_item_id = ?",
+        (1,),
+        {"consumo": "idx_consumo_item"},
+    ),
+    "despensa disponible": (
+        "SELECT ean FROM despensa WHERE estado = ?",
+        ("disponible",),
+        {"despensa": "idx_despensa_estado"},
+    ),
+    "lista de la compra": (
+        "SELECT * FROM lista_compra ORDER BY comprado, nombre",
+        (),
+        {"lista_compra": "idx_lista_compra_comprado"},
+    ),
+    "lista de la compra pendiente": (
+        "SELECT * FROM lista_compra WHERE comprado = 0 ORDER BY nombre",
+        (),
+        {"lista_compra": "idx_lista_compra_comprado"},
+    ),
+}
+
+
+def funciones_rango(crud) -> dict:
+    hasta = date.today()
+    desde = hasta - timedelta(days=6)
+    dia_ids = [dia["id"] for dia in crud.list_dias()][:7] or ["01/01/2030"]
+    return {
+        "resumen_macros_comidas (/dashboard/semana)": lambda: crud.resumen_macros_comidas(desde, hasta),
+        "list_items_por_dias (/dashboard/semana)": lambda: crud.list_items_por_dias(dia_ids),
+        "resumen_macros_dias (/dias)": lambda: crud.resumen_macros_dias(dia_ids),
+        "list_faltantes_compra (/lista-compra/auto)": lambda: crud.list_faltantes_compra(desde, hasta),
+    }
+
+
+def plan(connection, sql: str, parametros: tuple) -> list[str]:
+    return [fila[3] for fila in connection.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()]
+
+
+def pasos_prohibidos(pasos: list[str], tablas: set[str]) -> list[str]:
+    return [
+        paso
+        for paso in pasos
+        if "AUTOMATIC" in paso or (paso.startswith("SCAN ") and paso.split()[1] in tablas)
+    ]
+
+
+def main() -> None:
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-planes-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+
+    from backend.app import crud, db
+
+    fallos = []
+    try:
+        with db.get_connection() as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            print(f"versión de esquema {version}/{db.VERSION_ESQUEMA}\n")
+            for nombre, (sql, parametros, esperados) in CONSULTAS.items():
+                pasos = plan(connection, sql, parametros)
+                print(nombre)
+                for paso in pasos:
+                    print(f"    {paso}")
+                for tabla, indice in esperados.items():
+                    if not any(tabla in paso.split() and indice in paso for paso in pasos):
+                        fallos.append(f"{nombre}: {tabla} no usa {indice}")
+            tablas = {
+                fila[0] for fila in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+        for nombre, funcion in funciones_rango(crud).items():
+            with db.contar_consultas() as consultas:
+                funcion()
+            with db.get_connection() as connection:
+                for sql in consultas:
+                    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                        continue
+                    pasos = plan(connection, sql, ())
+                    print(nombre)
+                    for paso in pasos:
+                        print(f"    {paso}")
+                    for paso in pasos_prohibidos(pasos, tablas):
+                        fallos.append(f"{nombre}: {paso}")
+    finally:
+        db.cerrar_conexiones()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if fallos:
+        print("\nConsultas sin índice:")
+        for fallo in fallos:
+            print(f"    {fallo}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
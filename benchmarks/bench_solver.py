@@ -0,0 +1,77 @@
+"""Compara el solver de porciones con el ajuste clásico de generar_menu_dia.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_solver.py [--dias 200]
+
+Trabaja sobre una copia temporal de backend/befitlab.db, nunca sobre la original.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dias", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-bench-"))
+    db_path = tmp / "befitlab.db"
+    shutil.copy(RAIZ / "backend" / "befitlab.db", db_path)
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+
+    from backend.app import db
+    from backend.app.services.generator import (
+        MEAL_ORDER,
+        _dentro_margen_macros,
+        _totales_menu,
+        generar_menu_dia,
+        objetivos_por_tipo,
+    )
+    from backend.app.services.solver import MACROS
+
+    comidas = [{"nombre": nombre} for nombre in MEAL_ORDER]
+    print(f"{'modo':>8} {'tipo':>9} {'en margen':>10} {'err kcal':>9} {'err P%':>7} {'err H%':>7} {'err G%':>7} {'ms p50':>7} {'ms p95':>7}")
+    try:
+        for tipo in ("Entreno", "Descanso"):
+            objetivo = objetivos_por_tipo(tipo)
+            generar_menu_dia(comidas, tipo)
+            for modo in ("ajuste", "solver"):
+                tiempos = []
+                errores = {macro: [] for macro in MACROS}
+                en_margen = 0
+                for _ in range(args.dias):
+                    inicio = time.perf_counter()
+                    menu = generar_menu_dia(comidas, tipo, modo)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                    totals = _totales_menu(menu)
+                    en_margen += _dentro_margen_macros(objetivo, totals)
+                    errores["kcal"].append(abs(totals["kcal"] - objetivo["kcal"]))
+                    for macro in MACROS[1:]:
+                        errores[macro].append(abs(totals[macro] - objetivo[macro]) / objetivo[macro] * 100)
+                tiempos.sort()
+                print(
+                    f"{modo:>8} {tipo:>9} {en_margen / args.dias:>9.0%} "
+                    f"{statistics.mean(errores['kcal']):>9.0f} "
+                    f"{statistics.mean(errores['proteina']):>7.1f} "
+                    f"{statistics.mean(errores['hidratos']):>7.1f} "
+                    f"{statistics.mean(errores['grasas']):>7.1f} "
+                    f"{tiempos[len(tiempos) // 2]:>7.2f} {tiempos[int(len(tiempos) * 0.95)]:>7.2f}"
+                )
+    finally:
+        db.cerrar_conexiones()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Mide las rutas calientes del backend sobre un dataset sintético y guarda JSON.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/bench_suite.py --escala 10k [--repeticiones 5] [--salida resultados.json]
+    python benchmarks/bench_suite.py --escala 10k --comparar resultados-anteriores.json
+
+Construye la base de datos con datos_sinteticos.py en un directorio temporal y
+usa FastAPI TestClient contra ella. Por defecto el JSON se escribe en
+benchmarks/resultados/<escala>-<commit>.json, de forma que dos commits se
+pueden comparar con --comparar.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from benchmarks.datos_sinteticos import ESCALAS, alimento_sintetico, construir  # noqa: E402
+
+FILAS_CSV = 5_000
+MAX_ALIMENTOS_COMPLETO = 100_000
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def medir(funcion: Callable[[], object], repeticiones: int) -> dict:
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "n": len(tiempos),
+        "min_ms": round(tiempos[0], 3),
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[max(int(len(tiempos) * 0.95) - 1, 0)], 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+    }
+
+
+def _csv_sintetico(filas: int) -> bytes:
+    aleatorio = random.Random(99)
+    salida = io.StringIO()
+    escritor = None
+    for indice in range(filas):
+        alimento = alimento_sintetico(aleatorio, 9_000_000 + indice)
+        alimento["marca"] = alimento["marca"] or ""
+        if escritor is None:
+            escritor = csv.DictWriter(salida, fieldnames=list(alimento))
+            escritor.writeheader()
+        escritor.writerow(alimento)
+    return salida.getvalue().encode("utf-8")
+
+
+def ejecutar(escala: str, repeticiones: int, semilla: int) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="befitlab-suite-"))
+    db_path = tmp / "befitlab.db"
+    os.environ["BEFITLAB_DB_PATH"] = str(db_path)
+    try:
+        dataset = construir(db_path, escala, semilla)
+
+        from fastapi.testclient import TestClient
+
+        from backend.app import crud, db
+        from backend.app.main import app
+        from backend.app.services.generator import MEAL_ORDER, crear_contexto, generar_menu_dia
+        from backend.app.services.stats import resumen_dia
+
+        db.DB_PATH = db_path
+        comidas = [{"nombre": nombre} for nombre in MEAL_ORDER]
+        cuerpo_csv = _csv_sintetico(FILAS_CSV)
+        hoy = {"id": date.today().isoformat()}
+        resultados = {}
+        with TestClient(app) as client:
+            contexto = crear_contexto(semilla)
+
+            def get(ruta: str) -> Callable[[], object]:
+                def llamar() -> object:
+                    response = client.get(ruta)
+                    response.raise_for_status()
+                    return response.content
+
+                return llamar
+
+            def importar_csv() -> None:
+                client.post(
+                    "/alimentos/bulk",
+                    content=cuerpo_csv,
+                    headers={"Content-Type": "text/csv; charset=utf-8"},
+                ).raise_for_status()
+
+            casos = {
+                "generar_menu_dia": lambda: generar_menu_dia(comidas, "Entreno", "solver", contexto),
+                "generar_menu_dia_ajuste": lambda: generar_menu_dia(comidas, "Entreno", "ajuste", contexto),
+                "generar_menu_dia (memo)": lambda: generar_menu_dia(comidas, "Entreno", "solver", crear_contexto(semilla)),
+                "resumen_dia": lambda: resumen_dia(hoy),
+                "list_dias": crud.list_dias,
+                "GET /dias": get("/dias"),
+                "GET /lista-compra/auto": get("/lista-compra/auto?rango_dias=7"),
+                "GET /dashboard/semana": get("/dashboard/semana"),
+                "GET /alimentos?limit=1000": get("/alimentos?limit=1000"),
+                "GET /alimentos?stream=true": get("/alimentos?stream=true"),
+                f"POST /alimentos/bulk ({FILAS_CSV} filas)": importar_csv,
+            }
+            if ESCALAS[escala]["alimentos"] <= MAX_ALIMENTOS_COMPLETO:
+                casos["GET /alimentos"] = get("/alimentos")
+            for nombre, funcion in casos.items():
+                resultados[nombre] = medir(funcion, repeticiones)
+                print(f"{nombre:<40} p50={resultados[nombre]['p50_ms']:>10.2f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "commit": _commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "escala": escala,
+        "repeticiones": repeticiones,
+        "dataset": dataset,
+        "resultados": resultados,
+    }
+
+
+def comparar(actual: dict, anterior: dict) -> None:
+    print(f"\nComparación con {anterior['commit']} (p50):")
+    for nombre, medida in actual["resultados"].items():
+        previa = anterior["resultados"].get(nombre)
+        if not previa:
+            continue
+        ratio = medida["p50_ms"] / previa["p50_ms"] if previa["p50_ms"] else float("inf")
+        print(f"{nombre:<40} {previa['p50_ms']:>10.2f} -> {medida['p50_ms']:>10.2f} ms  x{ratio:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="10k")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", type=Path)
+    parser.add_argument("--comparar", type=Path)
+    args = parser.parse_args()
+
+    informe = ejecutar(args.escala, args.repeticiones, args.semilla)
+    salida = args.salida or RAIZ / "benchmarks" / "resultados" / f"{args.escala}-{informe['commit']}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados guardados en {salida}")
+    if args.comparar:
+        comparar(informe, json.loads(args.comparar.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Construye una base de datos sintética y reproducible a distintas escalas.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/datos_sinteticos.py /tmp/befitlab-100k.db --escala 100k [--semilla 1]
+
+También se usa como módulo desde bench_suite.py.
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+ESCALAS = {
+    "10k": {"alimentos": 10_000, "anios": 1, "eventos_dia": 10, "despensa": 500},
+    "100k": {"alimentos": 100_000, "anios": 3, "eventos_dia": 20, "despensa": 2_000},
+    "1m": {"alimentos": 1_000_000, "anios": 5, "eventos_dia": 40, "despensa": 10_000},
+}
+
+COMIDAS_DIA = ["Desayuno", "Media mañana", "Almuerzo", "Merienda", "Cena"]
+ITEMS_COMIDA = 3
+LOTE = 20_000
+EAN_BASE = 2_000_000_000_000
+
+BASES = [
+    "Pechuga", "Arroz", "Avena", "Yogur", "Queso", "Manzana", "Plátano", "Pan", "Huevo", "Atún",
+    "Lentejas", "Garbanzos", "Pasta", "Aceite", "Almendras", "Jamón", "Leche", "Salmón", "Patata", "Chocolate",
+]
+VARIANTES = ["integral", "natural", "light", "ecológico", "casero", "tostado", "fresco", "desnatado", "cocido", "extra"]
+MARCAS = ["Hacendado", "Carrefour", "Eroski", "Dia", "Auchan", None]
+GRUPOS = [
+    ("proteina", "Carnes", "Aves"),
+    ("proteina", "Pescados", "Azul"),
+    ("proteina", "Huevos", "Huevos"),
+    ("proteina", "Lácteos", "Yogures"),
+    ("proteina", "Embutidos", "Curados"),
+    ("hidrato", "Cereales y pan", "Pan"),
+    ("hidrato", "Legumbres", "Secas"),
+    ("hidrato", "Tubérculos", "Patata"),
+    ("hidrato", "Fruta", "Fresca"),
+    ("grasa", "Aceites", "Oliva"),
+    ("grasa", "Frutos secos", "Crudos"),
+    ("grasa", "Chocolate", "Chocolate negro"),
+    ("verdura", "Verduras", "Hoja"),
+    ("otros", "Otros", "Varios"),
+]
+EVENTOS = ["generar_menu", "aceptado", "rechazado", "modificado", "sustituir_alimento", "agregar_golosina"]
+
+
+def alimento_sintetico(aleatorio: random.Random, indice: int) -> dict:
+    rol, grupo, subgrupo = aleatorio.choice(GRUPOS)
+    proteina = round(aleatorio.uniform(0, 35), 1)
+    hidratos = round(aleatorio.uniform(0, 80), 1)
+    grasas = round(aleatorio.uniform(0, 40), 1)
+    return {
+        "ean": str(EAN_BASE + indice),
+        "nombre": f"{aleatorio.choice(BASES)} {aleatorio.choice(VARIANTES)} {indice}",
+        "marca": aleatorio.choice(MARCAS),
+        "kcal_100g": round(proteina * 4 + hidratos * 4 + grasas * 9, 1),
+        "proteina_100g": proteina,
+        "hidratos_100g": hidratos,
+        "grasas_100g": grasas,
+        "rol_principal": rol,
+        "grupo_funcional": grupo,
+        "subgrupo_funcional": subgrupo,
+    }
+
+
+def construir(db_path: Path, escala: str, semilla: int = 1) -> dict:
+    from backend.app import db
+    from backend.app.clasificacion import clasificar
+
+    parametros = ESCALAS[escala]
+    aleatorio = random.Random(semilla)
+    inicio = time.perf_counter()
+    db.cerrar_conexiones()
+    db.DB_PATH = Path(db_path)
+    db.init_db()
+
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    with connection:
+        alimentos = []
+        muestra = []
+        paso = max(parametros["alimentos"] // 2_000, 1)
+        for indice in range(parametros["alimentos"]):
+            alimento = alimento_sintetico(aleatorio, indice)
+            alimentos.append(alimento)
+            if indice % paso == 0:
+                muestra.append(alimento)
+            if len(alimentos) >= LOTE:
+                _insertar_alimentos(connection, alimentos, clasificar)
+                alimentos = []
+        _insertar_alimentos(connection, alimentos, clasificar)
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO despensa (ean, nombre, estado) VALUES (?, ?, ?)",
+            [
+                (alimento["ean"], alimento["nombre"], aleatorio.choice(["disponible", "agotado"]))
+                for alimento in aleatorio.sample(muestra, min(parametros["despensa"], len(muestra)))
+            ],
+        )
+
+        hoy = date.today()
+        primer_dia = hoy - timedelta(days=365 * parametros["anios"])
+        total_dias = (hoy - primer_dia).days + 7
+        comida_id = 0
+        item_id = 0
+        for offset in range(total_dias):
+            dia = primer_dia + timedelta(days=offset)
+            fecha = dia.isoformat()
+            connection.execute(
+                "INSERT OR REPLACE INTO dias (id, fecha, tipo) VALUES (?, ?, ?)",
+                (fecha, fecha, "Entreno" if dia.weekday() % 2 == 0 else "Descanso"),
+            )
+            comidas = []
+            items = []
+            consumos = []
+            for nombre in COMIDAS_DIA:
+                comida_id += 1
+                comidas.append((comida_id, fecha, nombre, int(nombre in {"Almuerzo", "Cena"})))
+                for alimento in aleatorio.sample(muestra, ITEMS_COMIDA):
+                    item_id += 1
+                    gramos = round(aleatorio.uniform(30, 250), 1)
+                    factor = gramos / 100
+                    items.append(
+                        (
+                            item_id,
+                            comida_id,
+                            alimento["ean"],
+                            alimento["nombre"],
+                            gramos,
+                            alimento["kcal_100g"] * factor,
+                            alimento["proteina_100g"] * factor,
+                            alimento["hidratos_100g"] * factor,
+                            alimento["grasas_100g"] * factor,
+                            alimento["rol_principal"],
+                            gramos,
+                        )
+                    )
+                    if dia <= hoy:
+                        consumos.append((item_id, aleatorio.choice(EVENTOS[1:4]), gramos))
+            connection.executemany(
+                "INSERT INTO comidas (id, dia_id, nombre, postre_obligatorio) VALUES (?, ?, ?, ?)",
+                comidas,
+            )
+            connection.executemany(
+                """
+                INSERT INTO comida_items (
+                    id, comida_id, ean, nombre, gramos, kcal, proteina, hidratos, grasas,
+                    rol_principal, es_golosina, gramos_iniciales
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)
+                """,
+                items,
+            )
+            connection.executemany(
+                "INSERT INTO consumo (comida_item_id, estado, gramos) VALUES (?, ?, ?)",
+                consumos,
+            )
+            momento = datetime.combine(dia, datetime.min.time())
+            connection.executemany(
+                "INSERT INTO aprendizaje (evento, detalle, creado_en) VALUES (?, ?, ?)",
+                [
+                    (
+                        aleatorio.choice(EVENTOS),
+                        f"item_id={aleatorio.randint(1, max(item_id, 1))}",
+                        (momento + timedelta(seconds=aleatorio.randrange(86_400))).isoformat(),
+                    )
+                    for _ in range(parametros["eventos_dia"])
+                ],
+            )
+    connection.execute("ANALYZE")
+    conteos = {
+        tabla: connection.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+        for tabla in ("alimentos", "dias", "comidas", "comida_items", "consumo", "aprendizaje", "despensa")
+    }
+    connection.close()
+    return {"escala": escala, "semilla": semilla, "segundos": round(time.perf_counter() - inicio, 2), "filas": conteos}
+
+
+def _insertar_alimentos(connection: sqlite3.Connection, alimentos: list[dict], clasificar) -> None:
+    connection.executemany(
+        """
+        INSERT INTO alimentos (
+            ean, nombre, marca, kcal_100g, proteina_100g, hidratos_100g, grasas_100g,
+            rol_principal, grupo_funcional, subgrupo_funcional, clasificacion
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                alimento["ean"],
+                alimento["nombre"],
+                alimento["marca"],
+                alimento["kcal_100g"],
+                alimento["proteina_100g"],
+                alimento["hidratos_100g"],
+                alimento["grasas_100g"],
+                alimento["rol_principal"],
+                alimento["grupo_funcional"],
+                alimento["subgrupo_funcional"],
+                clasificar(alimento),
+            )
+            for alimento in alimentos
+        ],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("destino", type=Path)
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="10k")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+    if args.destino.exists():
+        parser.error(f"{args.destino} ya existe")
+    print(construir(args.destino, args.escala, args.semilla))
+
+
+if __name__ == "__main__":
+    main()
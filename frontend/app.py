@@ -1,5 +1,10 @@
+import copy
 import csv
 import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from json import JSONDecodeError
 
@@ -7,9 +12,15 @@ import requests
 import streamlit as st
 from PIL import Image
 from pyzbar.pyzbar import decode as decode_barcode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
-API_URL = "http://localhost:8000"
+API_URL = os.getenv("BEFITLAB_API_URL", "http://localhost:8000")
+API_CONNECT_TIMEOUT = float(os.getenv("BEFITLAB_API_CONNECT_TIMEOUT", "3"))
+API_READ_TIMEOUT = float(os.getenv("BEFITLAB_API_READ_TIMEOUT", "10"))
+API_REINTENTOS = int(os.getenv("BEFITLAB_API_REINTENTOS", "3"))
+API_POOL_SIZE = int(os.getenv("BEFITLAB_API_POOL_SIZE", "8"))
 
 
 st.set_page_config(page_title="BeFitLab", layout="wide")
@@ -184,21 +195,173 @@ st.markdown(
 )
 
 
-def get(endpoint: str, params: dict | None = None):
+CACHE_TTL = 60
+
+
+class ClientCache:
+    def __init__(self, ttl: float = CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.entradas: dict[tuple, dict] = {}
+        self.estadisticas: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _contar(self, seccion: str, campo: str) -> None:
+        contadores = self.estadisticas.setdefault(seccion, {"hits": 0, "misses": 0, "revalidadas": 0})
+        contadores[campo] += 1
+
+    def obtener(self, clave: tuple, seccion: str) -> tuple[dict | None, bool]:
+        with self._lock:
+            entrada = self.entradas.get(clave)
+            vigente = bool(entrada) and entrada["expira"] > time.monotonic()
+            self._contar(seccion, "hits" if vigente else "misses")
+            return entrada, vigente
+
+    def guardar(self, clave: tuple, data, etag: str | None, tags: set[str]) -> None:
+        with self._lock:
+            self.entradas[clave] = {
+                "data": data,
+                "etag": etag,
+                "tags": tags,
+                "expira": time.monotonic() + self.ttl,
+            }
+
+    def renovar(self, clave: tuple, seccion: str) -> None:
+        with self._lock:
+            entrada = self.entradas.get(clave)
+            if entrada:
+                entrada["expira"] = time.monotonic() + self.ttl
+            self._contar(seccion, "revalidadas")
+
+    def invalidar(self, tags: set[str]) -> None:
+        with self._lock:
+            for entrada in self.entradas.values():
+                if entrada["tags"] & tags:
+                    entrada["expira"] = 0
+
+
+@st.cache_resource
+def client_cache() -> ClientCache:
+    return ClientCache()
+
+
+class ApiClient:
+    def __init__(
+        self,
+        base_url: str = API_URL,
+        timeout: tuple[float, float] = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT),
+        reintentos: int = API_REINTENTOS,
+        pool_size: int = API_POOL_SIZE,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=reintentos,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="befitlab-api")
+
+    def url(self, endpoint: str) -> str:
+        if endpoint.startswith(("http://", "https://")):
+            return endpoint
+        return f"{self.base_url}{endpoint}"
+
+    def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(endpoint), **kwargs)
+
+    def get_many(self, funcion, peticiones: list) -> list:
+        return list(self.executor.map(lambda peticion: funcion(*peticion), peticiones))
+
+
+@st.cache_resource
+def api_client() -> ApiClient:
+    return ApiClient()
+
+
+def tags_lectura(endpoint: str) -> set[str]:
+    partes = endpoint.strip("/").split("/")
+    if partes[0] == "dias" and len(partes) == 1:
+        return {"calendario"}
+    if partes[0] in {"dias", "estadisticas"} and len(partes) >= 2:
+        return {f"dia:{partes[1]}", "perfil"}
+    if partes[0] == "comidas":
+        return {f"comida:{partes[1]}"}
+    if partes[0] == "dashboard":
+        return {"semana", "perfil"}
+    if endpoint == "/lista-compra/auto":
+        return {"semana", "despensa", "compra"}
+    if partes[0] == "lista-compra":
+        return {"compra"}
+    if partes[0] == "despensa":
+        return {"despensa"}
+    if partes[0] == "perfil":
+        return {"perfil"}
+    if partes[0] == "alimentos":
+        return {"catalogo"}
+    return {endpoint}
+
+
+def _get(cache: ClientCache, cliente: ApiClient, endpoint: str, params: dict | None, seccion: str):
     params_tuple = tuple(sorted((params or {}).items()))
-    return cached_get(endpoint, params_tuple)
+    clave = (endpoint, params_tuple)
+    entrada, vigente = cache.obtener(clave, seccion)
+    if vigente:
+        return copy.deepcopy(entrada["data"])
+    headers = {"If-None-Match": entrada["etag"]} if entrada and entrada["etag"] else None
+    response = cliente.request("GET", endpoint, params=dict(params_tuple) or None, headers=headers)
+    if response.status_code == 304 and entrada:
+        cache.renovar(clave, seccion)
+        return copy.deepcopy(entrada["data"])
+    data = parse_response(response)
+    if response.status_code == 200:
+        cache.guardar(clave, data, response.headers.get("ETag"), tags_lectura(endpoint))
+    return copy.deepcopy(data)
+
+
+def get(endpoint: str, params: dict | None = None, seccion: str | None = None):
+    if seccion is None:
+        seccion = st.session_state.get("section", "")
+    return _get(client_cache(), api_client(), endpoint, params, seccion)
+
+
+def get_many(peticiones: list[tuple[str, dict | None]]) -> list:
+    seccion = st.session_state.get("section", "")
+    cache = client_cache()
+    cliente = api_client()
+    return cliente.get_many(
+        lambda endpoint, params: _get(cache, cliente, endpoint, params, seccion),
+        peticiones,
+    )
 
 
-def post(endpoint: str, payload: dict):
-    response = requests.post(f"{API_URL}{endpoint}", json=payload, timeout=10)
-    st.cache_data.clear()
+def invalidar(*tags: str) -> None:
+    client_cache().invalidar(set(tags))
+
+
+def post(endpoint: str, payload: dict, invalida: set[str]):
+    response = api_client().request("POST", endpoint, json=payload)
+    invalidar(*invalida)
     return parse_response(response)
 
 
-@st.cache_data(show_spinner=False, ttl=60)
-def cached_get(endpoint: str, params_tuple: tuple[tuple[str, str], ...]):
-    params = dict(params_tuple)
-    response = requests.get(f"{API_URL}{endpoint}", params=params or None, timeout=10)
+def put(endpoint: str, payload: dict, invalida: set[str]):
+    response = api_client().request("PUT", endpoint, json=payload)
+    invalidar(*invalida)
+    return parse_response(response)
+
+
+def delete(endpoint: str, invalida: set[str]):
+    response = api_client().request("DELETE", endpoint)
+    invalidar(*invalida)
     return parse_response(response)
 
 
@@ -253,12 +416,16 @@ def render_dashboard_card(title: str, value: str, subtitle: str, badge: str = ""
 
 
 if st.session_state.section == "Dashboard":
-    dias = get("/dias")
-    perfil = get("/perfil")
+    dias, perfil, despensa_disponible, despensa_agotado, lista_compra = get_many(
+        [
+            ("/dias", None),
+            ("/perfil", None),
+            ("/despensa", {"estado": "disponible"}),
+            ("/despensa", {"estado": "agotado"}),
+            ("/lista-compra/auto", {"rango_dias": 7}),
+        ]
+    )
     objetivos_lista = perfil.get("objetivos", [])
-    despensa_disponible = get("/despensa", {"estado": "disponible"})
-    despensa_agotado = get("/despensa", {"estado": "agotado"})
-    lista_compra = get("/lista-compra/auto", {"rango_dias": 7})
     total_dias = len(dias) if isinstance(dias, list) else 0
     tipos_dia = len(objetivos_lista)
     disponibles = len(despensa_disponible) if isinstance(despensa_disponible, list) else 0
@@ -308,32 +475,33 @@ elif st.session_state.section == "Programación":
         min_value=date(today.year, 1, 1),
         max_value=date(today.year, 12, 31),
     )
-    dias = get("/dias")
-    perfil = get("/perfil")
+    dias, perfil, semana = get_many(
+        [
+            ("/dias", None),
+            ("/perfil", None),
+            ("/dashboard/semana", {"desde": today.isoformat(), "dias": 7}),
+        ]
+    )
     objetivos = {item["tipo"]: item for item in perfil.get("objetivos", [])}
     dias_por_fecha = {dia["fecha"]: dia for dia in dias}
+    semana_por_fecha = {dia["fecha_iso"]: dia for dia in semana.get("dias", [])}
     for offset in range(7):
-        fecha = format_fecha(today + timedelta(days=offset))
-        dia = dias_por_fecha.get(fecha)
+        dia_fecha = today + timedelta(days=offset)
+        fecha = format_fecha(dia_fecha)
+        dia = semana_por_fecha.get(dia_fecha.isoformat())
         st.markdown(f"#### {fecha}")
         if not dia:
             st.info("Sin propuesta generada todavía.")
             continue
-        comidas = get(f"/dias/{dia['id']}/comidas")
-        items_totales: list[dict] = []
-        menu_por_comida = []
-        for comida in comidas:
-            items = get(f"/comidas/{comida['id']}/items")
-            items_totales.extend(items)
-            menu_por_comida.append({"nombre": comida["nombre"], "items": items})
-        if not items_totales:
+        menu_por_comida = dia["comidas"]
+        if not any(menu["items"] for menu in menu_por_comida):
             st.info("Sin items generados aún para este día.")
             continue
-        objetivo = objetivos.get(dia.get("tipo", "Entreno"), {})
-        kcal_total = sum(item["kcal"] for item in items_totales)
-        proteina_total = sum(item["proteina"] for item in items_totales)
-        hidratos_total = sum(item["hidratos"] for item in items_totales)
-        grasas_total = sum(item["grasas"] for item in items_totales)
+        objetivo = dia["objetivo"]
+        kcal_total = dia["totales"]["kcal"]
+        proteina_total = dia["totales"]["proteina"]
+        hidratos_total = dia["totales"]["hidratos"]
+        grasas_total = dia["totales"]["grasas"]
         kcal_obj = float(objetivo.get("kcal", 0) or 0)
         prot_obj = float(objetivo.get("proteina", 0) or 0)
         hidr_obj = float(objetivo.get("hidratos", 0) or 0)
@@ -370,23 +538,20 @@ elif st.session_state.section == "Programación":
                 ]
             )
         if st.button("Eliminar día", key=f"delete-dia-{fecha}"):
-            requests.delete(f"{API_URL}/dias/{dia['id']}", timeout=10)
-            st.cache_data.clear()
+            delete(f"/dias/{dia['id']}", {"calendario", f"dia:{dia['id']}", "semana"})
             st.rerun()
     st.markdown("### Consultar cualquier día")
     fecha_consulta = format_fecha(consulta_fecha)
-    dia = dias_por_fecha.get(fecha_consulta)
+    dia = dias_por_fecha.get(consulta_fecha.isoformat())
     st.markdown(f"#### {fecha_consulta}")
     if not dia:
         st.info("Sin propuesta generada para este día.")
     else:
-        comidas = get(f"/dias/{dia['id']}/comidas")
-        items_totales: list[dict] = []
-        menu_por_comida = []
-        for comida in comidas:
-            items = get(f"/comidas/{comida['id']}/items")
-            items_totales.extend(items)
-            menu_por_comida.append({"nombre": comida["nombre"], "items": items})
+        completo = get(f"/dias/{dia['id']}/completo")
+        menu_por_comida = [
+            {"nombre": comida["nombre"], "items": comida["items"]} for comida in completo.get("comidas", [])
+        ]
+        items_totales = [item for menu in menu_por_comida for item in menu["items"]]
         if not items_totales:
             st.info("Sin items generados aún para este día.")
         else:
@@ -444,8 +609,7 @@ elif st.session_state.section == "Perfil":
         row_cols[0].markdown(f"**{tipo}**")
         if tipo not in {"Entreno", "Descanso"}:
             if row_cols[1].button("Eliminar", key=f"delete-tipo-{tipo}"):
-                requests.delete(f"{API_URL}/perfil/objetivos/{tipo}", timeout=10)
-                st.cache_data.clear()
+                delete(f"/perfil/objetivos/{tipo}", {"perfil"})
                 st.rerun()
     with st.form("perfil-form"):
         st.markdown("### Objetivos por tipo de día")
@@ -488,11 +652,7 @@ elif st.session_state.section == "Perfil":
                 )
         submitted = st.form_submit_button("Guardar perfil")
     if submitted:
-        requests.put(
-            f"{API_URL}/perfil",
-            json={"objetivos": objetivos_payload},
-            timeout=10,
-        )
+        put("/perfil", {"objetivos": objetivos_payload}, {"perfil"})
         st.success("Perfil actualizado.")
     with st.form("nuevo-reparto-form"):
         st.markdown("### Nuevo tipo de día")
@@ -509,18 +669,17 @@ elif st.session_state.section == "Perfil":
         proteina = (kcal_nuevo * (pct_proteina / 100)) / 4 if kcal_nuevo else 0
         hidratos = (kcal_nuevo * (pct_hidratos / 100)) / 4 if kcal_nuevo else 0
         grasas = (kcal_nuevo * (pct_grasas / 100)) / 9 if kcal_nuevo else 0
-        requests.post(
-            f"{API_URL}/perfil/objetivos",
-            json={
+        post(
+            "/perfil/objetivos",
+            {
                 "tipo": nuevo_tipo,
                 "kcal": kcal_nuevo,
                 "proteina": proteina,
                 "hidratos": hidratos,
                 "grasas": grasas,
             },
-            timeout=10,
+            {"perfil"},
         )
-        st.cache_data.clear()
         st.success("Tipo de día guardado.")
         st.rerun()
 
@@ -557,37 +716,32 @@ elif st.session_state.section == "Alimentos":
                     filas = list(lector)
                     st.dataframe(filas[:5])
                     if st.button("Importar alimentos"):
-                        errores = 0
-                        total = len(filas)
-                        progreso = st.progress(0)
-                        estado = st.empty()
-                        batch_size = 25
-                        exitos = 0
-                        with requests.Session() as session:
-                            for fila in filas:
-                                try:
-                                    payload = {
-                                        "ean": fila.get("ean") or None,
-                                        "nombre": fila["nombre"],
-                                        "marca": fila.get("marca") or None,
-                                        "kcal_100g": float(fila["kcal_100g"]),
-                                        "proteina_100g": float(fila["proteina_100g"]),
-                                        "hidratos_100g": float(fila["hidratos_100g"]),
-                                        "grasas_100g": float(fila["grasas_100g"]),
-                                        "rol_principal": fila["rol_principal"],
-                                        "grupo_funcional": fila["grupo_funcional"],
-                                        "subgrupo_funcional": fila["subgrupo_funcional"],
-                                    }
-                                    session.post(f"{API_URL}/alimentos", json=payload, timeout=30)
-                                    exitos += 1
-                                except (ValueError, KeyError, requests.RequestException):
-                                    errores += 1
-                                progreso.progress(min((exitos + errores) / total, 1.0))
-                                if (exitos + errores) % batch_size == 0:
-                                    estado.write(f"Procesadas: {exitos + errores}/{total}")
-                        estado.write(f"Procesadas: {exitos + errores}/{total}")
-                        st.success(f"Importación finalizada. Éxitos: {exitos}. Errores: {errores}.")
-                        st.cache_data.clear()
+                        with st.spinner(f"Importando {len(filas)} filas..."):
+                            response = api_client().request(
+                                "POST",
+                                "/alimentos/bulk",
+                                params={"delimitador": delimitador},
+                                data=contenido.encode("utf-8"),
+                                headers={"Content-Type": "text/csv; charset=utf-8"},
+                                timeout=(API_CONNECT_TIMEOUT, 300),
+                            )
+                        resultado = parse_response(response)
+                        if response.status_code != 200 or not isinstance(resultado, dict):
+                            st.error(f"No se pudo importar el CSV: {response.text}")
+                        else:
+                            errores = resultado.get("errores", [])
+                            st.success(
+                                f"Importación finalizada. Éxitos: {resultado.get('insertadas', 0)}. "
+                                f"Errores: {len(errores)}."
+                            )
+                            if errores:
+                                st.dataframe(
+                                    [
+                                        {"fila": error["fila"], "errores": "; ".join(error["errores"])}
+                                        for error in errores
+                                    ]
+                                )
+                        invalidar("catalogo")
     with tabs[1]:
         st.markdown("### Recetas propias")
         with st.form("recetas-form"):
@@ -620,9 +774,9 @@ elif st.session_state.section == "Alimentos":
                         "grupo_funcional": grupo_funcional,
                         "subgrupo_funcional": subgrupo_funcional,
                     },
+                    {"catalogo"},
                 )
                 st.success("Receta guardada.")
-                st.cache_data.clear()
     with tabs[2]:
         st.markdown("### Buscar en Open Food Facts")
         if "off_query" not in st.session_state:
@@ -642,17 +796,17 @@ elif st.session_state.section == "Alimentos":
             if not consulta.strip():
                 st.warning("Introduce un valor de búsqueda.")
             elif criterio == "EAN":
-                response = requests.get(
+                response = api_client().request(
+                    "GET",
                     f"https://world.openfoodfacts.org/api/v2/product/{consulta.strip()}.json",
-                    timeout=10,
                 )
                 data = response.json() if response.content else {}
                 st.session_state.off_results = [data.get("product")] if data.get("product") else []
             else:
-                response = requests.get(
+                response = api_client().request(
+                    "GET",
                     "https://world.openfoodfacts.org/cgi/search.pl",
                     params={"search_terms": consulta.strip(), "search_simple": 1, "action": "process", "json": 1},
-                    timeout=10,
                 )
                 data = response.json() if response.content else {}
                 st.session_state.off_results = data.get("products", [])[:10]
@@ -718,9 +872,9 @@ elif st.session_state.section == "Alimentos":
                             "grupo_funcional": grupo_funcional,
                             "subgrupo_funcional": subgrupo_funcional,
                         },
+                        {"catalogo"},
                     )
                     st.success("Alimento importado.")
-                    st.cache_data.clear()
 
 
 elif st.session_state.section == "Generador":
@@ -731,12 +885,12 @@ elif st.session_state.section == "Generador":
         submit = st.form_submit_button("Crear y generar menú")
     if submit:
         payload = {"fecha": format_fecha(fecha), "tipo": tipo}
-        dia = post("/dias", payload)
+        dia = post("/dias", payload, {"calendario", "semana"})
         dia_id = dia.get("id")
         if dia_id:
-            post("/generador", {"dia_id": dia_id})
+            generado = post("/generador", {"dia_id": dia_id}, {f"dia:{dia_id}", "semana", "compra"})
+            st.session_state.desviacion_menu = generado.get("desviacion") if generado.get("fuera_de_margen") else None
             st.success("Menú generado.")
-            st.cache_data.clear()
             st.session_state.last_generated_day = dia_id
             st.rerun()
         else:
@@ -745,14 +899,20 @@ elif st.session_state.section == "Generador":
     if dias:
         dia_id = st.session_state.get("last_generated_day", dias[-1]["id"])
         if st.button("Regenerar menú completo"):
-            post("/generador", {"dia_id": dia_id})
+            generado = post("/generador", {"dia_id": dia_id}, {f"dia:{dia_id}", "semana", "compra"})
+            st.session_state.desviacion_menu = generado.get("desviacion") if generado.get("fuera_de_margen") else None
             st.success("Menú regenerado.")
-            st.cache_data.clear()
             st.rerun()
-        comidas = get(f"/dias/{dia_id}/comidas")
-        for comida in comidas:
+        desviacion = st.session_state.get("desviacion_menu")
+        if desviacion:
+            st.warning(
+                "El menú queda fuera del margen del objetivo: "
+                + ", ".join(f"{macro} {valor:+.1f}" for macro, valor in desviacion.items())
+            )
+        completo = get(f"/dias/{dia_id}/completo")
+        for comida in completo.get("comidas", []):
             st.markdown(f"### {comida['nombre']}")
-            items = get(f"/comidas/{comida['id']}/items")
+            items = comida["items"]
             st.dataframe(
                 [
                     {
@@ -784,18 +944,20 @@ elif st.session_state.section == "Despensa y compra":
             if not nombre_manual.strip():
                 st.warning("El nombre es obligatorio.")
             else:
-                requests.post(
-                    f"{API_URL}/despensa",
-                    json={"ean": ean_manual or None, "nombre": nombre_manual, "estado": estado_manual},
-                    timeout=10,
+                post(
+                    "/despensa",
+                    {"ean": ean_manual or None, "nombre": nombre_manual, "estado": estado_manual},
+                    {"despensa", "compra"},
                 )
-                st.cache_data.clear()
                 st.success("Despensa actualizada.")
                 st.rerun()
+        disponibles, agotados = get_many(
+            [("/despensa", {"estado": "disponible"}), ("/despensa", {"estado": "agotado"})]
+        )
         st.markdown("### Disponibles")
-        st.dataframe(get("/despensa", {"estado": "disponible"}))
+        st.dataframe(disponibles)
         st.markdown("### Agotados")
-        st.dataframe(get("/despensa", {"estado": "agotado"}))
+        st.dataframe(agotados)
     with tabs[1]:
         st.markdown("### Lista automática")
         rango = st.selectbox("Cobertura", ["7 días", "Hoy"])
@@ -811,12 +973,11 @@ elif st.session_state.section == "Despensa y compra":
                 cols[0].markdown(f"**{nombre}**")
                 cols[1].markdown(f"{gramos:.0f} g")
                 if cols[2].button("Marcar comprado", key=f"comprar-{item.get('ean')}-{nombre}"):
-                    requests.post(
-                        f"{API_URL}/despensa",
-                        json={"ean": item.get("ean"), "nombre": nombre, "estado": "disponible"},
-                        timeout=10,
+                    post(
+                        "/despensa",
+                        {"ean": item.get("ean"), "nombre": nombre, "estado": "disponible"},
+                        {"despensa", "compra"},
                     )
-                    st.cache_data.clear()
                     st.rerun()
 
 
@@ -825,25 +986,31 @@ elif st.session_state.section == "Consumo real":
     dias = get("/dias")
     if dias:
         dia_id = st.selectbox("Selecciona día", [dia["id"] for dia in dias])
-        comidas = get(f"/dias/{dia_id}/comidas")
-        for comida in comidas:
+        completo = get(f"/dias/{dia_id}/completo")
+        for comida in completo.get("comidas", []):
             st.markdown(f"### {comida['nombre']}")
-            items = get(f"/comidas/{comida['id']}/items")
+            items = comida["items"]
             for item in items:
+                estados = ["aceptado", "rechazado", "modificado"]
                 with st.form(f"consumo-{item['id']}"):
                     estado = st.selectbox(
                         "Estado",
-                        ["aceptado", "rechazado", "modificado"],
+                        estados,
+                        index=estados.index(item["consumo_estado"]) if item.get("consumo_estado") in estados else 0,
                         key=f"estado-{item['id']}",
                     )
                     gramos = st.number_input(
                         "Gramos consumidos",
-                        value=float(item["gramos"]),
+                        value=float(item["consumo_gramos"] if item.get("consumo_gramos") is not None else item["gramos"]),
                         key=f"gramos-{item['id']}",
                     )
                     submit = st.form_submit_button("Registrar")
                 if submit:
-                    post("/consumo", {"comida_item_id": item["id"], "estado": estado, "gramos": gramos})
+                    post(
+                        "/consumo",
+                        {"comida_item_id": item["id"], "estado": estado, "gramos": gramos},
+                        {f"dia:{dia_id}", "semana"},
+                    )
                     st.success("Registro guardado.")
     else:
         st.info("Crea un día antes de registrar consumo.")
@@ -855,3 +1022,11 @@ for idx, name in enumerate(SECTIONS):
     if nav_cols[idx].button(name, use_container_width=True):
         st.session_state.section = name
         st.rerun()
+
+with st.expander("Caché del cliente"):
+    st.dataframe(
+        [
+            {"sección": seccion, **contadores}
+            for seccion, contadores in sorted(client_cache().estadisticas.items())
+        ]
+    )
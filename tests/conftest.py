@@ -0,0 +1,58 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from backend.app import db
+
+BASE_DATOS = Path(__file__).resolve().parent.parent / "backend" / "befitlab.db"
+
+
+def _reiniciar_estado() -> None:
+    from backend.app.services import catalogo, generator
+
+    db.cerrar_conexiones()
+    with catalogo._indice_lock:
+        catalogo._indice = None
+    generator.memo_menus.limpiar()
+
+
+@pytest.fixture
+def befitlab_db(tmp_path, monkeypatch):
+    _reiniciar_estado()
+    destino = tmp_path / "befitlab.db"
+    shutil.copy(BASE_DATOS, destino)
+    monkeypatch.setattr(db, "DB_PATH", destino)
+    yield destino
+    _reiniciar_estado()
+
+
+@pytest.fixture
+def cliente_api(befitlab_db):
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def limite_consultas(cliente_api):
+    def comprobar(metodo: str, ruta: str, maximo: int, **kwargs):
+        response = cliente_api.request(metodo, ruta, **kwargs)
+        total = int(response.headers["x-query-count"])
+        repeticiones = int(response.headers["x-query-max-repeticiones"])
+        assert total <= maximo, (
+            f"{metodo} {ruta} ejecutó {total} consultas (máximo {maximo}, "
+            f"la más repetida {repeticiones} veces)"
+        )
+        return response
+
+    return comprobar
+
+
+@pytest.fixture
+def consultas_sql(befitlab_db):
+    with db.contar_consultas() as consultas:
+        yield consultas
@@ -0,0 +1,63 @@
+import sqlite3
+
+
+def test_alimentos_no_expone_clasificacion(cliente_api):
+    completos = cliente_api.get("/alimentos").json()
+    pagina = cliente_api.get("/alimentos", params={"limit": 5}).json()
+    encontrados = cliente_api.get("/alimentos/buscar", params={"q": "leche"}).json()
+    for alimento in [*completos, *pagina, *encontrados]:
+        assert "clasificacion" not in alimento
+    assert cliente_api.get("/alimentos", params={"fields": "nombre,clasificacion"}).status_code == 400
+
+
+def test_indice_catalogo_ve_escrituras_de_otro_proceso(befitlab_db):
+    from backend.app.services.catalogo import obtener_indice
+
+    ean = next(alimento["ean"] for alimento in obtener_indice().todos if alimento["ean"])
+    connection = sqlite3.connect(befitlab_db)
+    with connection:
+        connection.execute("UPDATE alimentos SET nombre = 'Renombrado fuera' WHERE ean = ?", (ean,))
+    connection.close()
+
+    assert obtener_indice().por_ean[ean]["nombre"] == "Renombrado fuera"
+
+
+def test_reimportar_csv_no_duplica_alimentos_sin_ean(cliente_api):
+    cabecera = "ean,nombre,marca,kcal_100g,proteina_100g,hidratos_100g,grasas_100g,rol_principal,grupo_funcional,subgrupo_funcional"
+    csv = "\n".join(
+        [
+            cabecera,
+            "9990000000017,Yogur de prueba,Marca,60,4,5,3,proteina,lacteo,yogures",
+            ",Pera de prueba,Mercadona Fresco,57,0.4,15,0.1,hidrato,fruta,frutas",
+            ",Pera de prueba,,57,0.4,15,0.1,hidrato,fruta,frutas",
+        ]
+    )
+
+    def contar() -> int:
+        alimentos = cliente_api.get("/alimentos").json()
+        return sum(alimento["nombre"].endswith("de prueba") for alimento in alimentos)
+
+    for _ in range(2):
+        response = cliente_api.post("/alimentos/bulk", content=csv, headers={"content-type": "text/csv"})
+        assert response.status_code == 200
+        assert contar() == 3
+
+
+def test_vacuum_reconstruye_la_busqueda(cliente_api, befitlab_db):
+    connection = sqlite3.connect(befitlab_db)
+    with connection:
+        connection.execute("DELETE FROM alimentos WHERE rowid % 2 = 0")
+        connection.execute("INSERT INTO alimentos_fts (alimentos_fts) VALUES ('delete-all')")
+    connection.close()
+    etag = cliente_api.get("/alimentos", params={"limit": 10}).headers["etag"]
+    assert cliente_api.get("/alimentos/buscar", params={"q": "leche"}).json() == []
+
+    assert cliente_api.post("/mantenimiento/vacuum").status_code == 200
+
+    connection = sqlite3.connect(befitlab_db)
+    connection.execute("INSERT INTO alimentos_fts (alimentos_fts, rank) VALUES ('integrity-check', 1)")
+    nombre, = connection.execute("SELECT nombre FROM alimentos ORDER BY rowid DESC LIMIT 1").fetchone()
+    connection.close()
+    encontrados = cliente_api.get("/alimentos/buscar", params={"q": nombre}).json()
+    assert nombre in {alimento["nombre"] for alimento in encontrados}
+    assert cliente_api.get("/alimentos", params={"limit": 10}, headers={"If-None-Match": etag}).status_code == 200
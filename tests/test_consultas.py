@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("metodo", "ruta", "maximo", "kwargs"),
+    [
+        ("GET", "/estadisticas/1", 2, {}),
+        ("GET", "/lista-compra/auto", 2, {}),
+        ("GET", "/lista-compra/auto?rango_dias=365", 2, {}),
+        ("GET", "/dias/1/completo", 4, {}),
+        ("GET", "/dashboard/semana?dias=31", 2, {}),
+        ("POST", "/generador", 22, {"json": {"dia_id": "1"}}),
+    ],
+)
+def test_presupuesto_consultas(limite_consultas, metodo, ruta, maximo, kwargs):
+    response = limite_consultas(metodo, ruta, maximo, **kwargs)
+    assert response.status_code == 200
+
@@ -0,0 +1,38 @@
+def test_migracion_normaliza_fechas_a_iso(cliente_api):
+    dias = {str(dia["id"]): dia["fecha"] for dia in cliente_api.get("/dias").json()}
+    assert dias["1"] == "2026-01-06"
+    assert dias["5"] == "2026-01-01"
+    assert dias["13"] == "2026-01-31"
+    assert list(dias.values()) == sorted(dias.values())
+
+    semana = cliente_api.get("/dashboard/semana", params={"desde": "2026-01-06", "dias": 1}).json()
+    assert {str(dia["id"]) for dia in semana["dias"]} == {"1", "4"}
+
+
+def test_crear_dia_guarda_la_fecha_en_iso(cliente_api):
+    dia_id = cliente_api.post("/dias", json={"fecha": "05/02/2030", "tipo": "Entreno"}).json()["id"]
+    dia = next(dia for dia in cliente_api.get("/dias").json() if str(dia["id"]) == dia_id)
+    assert dia["fecha"] == "2030-02-05"
+
+    assert cliente_api.post("/dias", json={"fecha": "31/02/2030", "tipo": "Entreno"}).status_code == 422
+
+
+def test_repetir_plan_semanal_reutiliza_los_dias(cliente_api):
+    peticion = {"fecha_inicio": "01/03/2030", "dias": 3, "tipo": "Entreno", "semilla": 1}
+    primero = cliente_api.post("/generador/semana", json=peticion).json()
+    dias = len(cliente_api.get("/dias").json())
+
+    segundo = cliente_api.post("/generador/semana", json={**peticion, "tipo": "Descanso"}).json()
+    assert len(cliente_api.get("/dias").json()) == dias
+    assert [plan["dia"]["id"] for plan in segundo] == [plan["dia"]["id"] for plan in primero]
+
+    for plan in segundo:
+        completo = cliente_api.get(f"/dias/{plan['dia']['id']}/completo").json()
+        assert completo["dia"]["tipo"] == "Descanso"
+        assert len(completo["comidas"]) == len(plan["comidas"])
+        assert sorted(item["nombre"] for comida in completo["comidas"] for item in comida["items"]) == sorted(
+            item["nombre"] for generada in plan["comidas"] for item in generada["items"]
+        )
+
+    assert cliente_api.post("/dias", json={"fecha": "01/03/2030", "tipo": "Entreno"}).json()["id"] == primero[0]["dia"]["id"]
+    assert len(cliente_api.get("/dias").json()) == dias
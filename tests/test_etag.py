@@ -0,0 +1,23 @@
+import sqlite3
+
+from backend.app import db
+
+
+def test_etag_cambia_con_escrituras_de_otro_proceso(cliente_api, befitlab_db):
+    etag = cliente_api.get("/dias").headers["etag"]
+    assert cliente_api.get("/dias", headers={"If-None-Match": etag}).status_code == 304
+
+    connection = sqlite3.connect(befitlab_db)
+    with connection:
+        connection.execute("UPDATE dias SET tipo = 'Descanso' WHERE id = 1")
+    connection.close()
+
+    response = cliente_api.get("/dias", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_etag_sobrevive_a_un_reinicio(cliente_api):
+    etag = cliente_api.get("/despensa").headers["etag"]
+    db.cerrar_conexiones()
+    assert cliente_api.get("/despensa", headers={"If-None-Match": etag}).status_code == 304
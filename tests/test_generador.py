@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend.app.services.generator import MEAL_ORDER, crear_contexto, generar_menu_dia
+
+COMIDAS = [{"nombre": nombre} for nombre in MEAL_ORDER]
+CONSULTAS_CONTEXTO = 4
+
+
+@pytest.mark.parametrize("modo", ["solver", "ajuste"])
+def test_generar_dias_cuesta_consultas_constantes(consultas_sql, modo):
+    generar_menu_dia(COMIDAS, "Entreno", modo, crear_contexto())
+    conteos = []
+    for dias in (1, 7, 31):
+        inicio = len(consultas_sql)
+        contexto = crear_contexto()
+        for _ in range(dias):
+            generar_menu_dia(COMIDAS, "Entreno", modo, contexto)
+        conteos.append(len(consultas_sql) - inicio)
+    assert conteos == [CONSULTAS_CONTEXTO] * 3
+
+
+def test_memo_no_sirve_menus_con_alimentos_borrados_fuera(befitlab_db):
+    menu = generar_menu_dia(COMIDAS, "Entreno", contexto=crear_contexto(semilla=7))
+    eans = {item["ean"] for items in menu.values() for item in items if item["ean"]}
+    assert eans
+
+    connection = sqlite3.connect(befitlab_db)
+    with connection:
+        connection.executemany("DELETE FROM alimentos WHERE ean = ?", [(ean,) for ean in eans])
+    connection.close()
+
+    menu = generar_menu_dia(COMIDAS, "Entreno", contexto=crear_contexto(semilla=7))
+    assert not eans & {item["ean"] for items in menu.values() for item in items}
+
+
+def test_generacion_fuera_del_hilo_escritor(cliente_api, monkeypatch):
+    from backend.app import main
+
+    hilos = []
+
+    def generar(*args, **kwargs):
+        hilos.append(threading.current_thread().name)
+        return generar_menu_dia(*args, **kwargs)
+
+    monkeypatch.setattr(main, "generar_menu_dia", generar)
+    assert cliente_api.post("/generador", json={"dia_id": "1"}).status_code == 200
+    assert cliente_api.post("/generador/semana", json={"fecha_inicio": "01/03/2030", "dias": 3}).status_code == 200
+    assert len(hilos) == 4
+    assert not any(hilo.startswith("befitlab-escritor") for hilo in hilos)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_generador_informa_si_queda_fuera_de_margen(cliente_api, semilla):
+    tipo = next(dia["tipo"] for dia in cliente_api.get("/dias").json() if str(dia["id"]) == "1")
+    objetivo = next(objetivo for objetivo in cliente_api.get("/perfil").json()["objetivos"] if objetivo["tipo"] == tipo)
+    generado = cliente_api.post("/generador", json={"dia_id": "1", "semilla": semilla}).json()
+
+    items = [item for comida in generado["comidas"] for item in comida["items"]]
+    fuera = False
+    for macro, desviacion in generado["desviacion"].items():
+        total = sum(item[macro] for item in items)
+        assert desviacion == pytest.approx(total - objetivo[macro], abs=0.1)
+        margen = 100 if macro == "kcal" else max(objetivo[macro] * 0.05, 1.0)
+        fuera = fuera or abs(desviacion) > margen
+    assert generado["fuera_de_margen"] == fuera
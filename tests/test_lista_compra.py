@@ -0,0 +1,13 @@
+from backend.app.services.generator import registrar_faltantes
+
+
+def test_faltantes_de_varias_generaciones_se_suman(cliente_api):
+    for _ in range(3):
+        registrar_faltantes([{"ean": None, "nombre": "Garbanzos de prueba", "gramos": 200}])
+    lista = {item["nombre"]: item for item in cliente_api.get("/lista-compra").json()}
+    assert lista["Garbanzos de prueba"]["gramos"] == 600
+
+    cliente_api.post("/lista-compra", json={"item_id": lista["Garbanzos de prueba"]["id"], "comprado": True})
+    registrar_faltantes([{"ean": None, "nombre": "Garbanzos de prueba", "gramos": 200}])
+    lista = {item["nombre"]: item for item in cliente_api.get("/lista-compra").json()}
+    assert lista["Garbanzos de prueba"]["gramos"] == 200